@@ -0,0 +1,121 @@
+"""
+Content-addressed resume storage
+
+Uploaded files are stored once per distinct content, under their SHA-256:
+
+    uploads/resumes/blobs/ab/cd/abcd1234...
+
+resume_blobs keeps a reference count per stored file. Uploading bytes that
+are already stored just adds a reference; deleting a resume (directly or
+with its user) drops one, and the file is removed with its last reference.
+
+The counter row is locked (updated) before the file is placed or removed,
+so an upload and a delete of the same content cannot interleave their file
+operations. Cached OCR text of a file (ocr_pages) goes with it.
+
+A file losing its last reference is only moved aside during the deleting
+flush; it is removed once that transaction commits, and put back if it
+rolls back, so rows that survive a rollback never point at a missing file.
+"""
+
+from datetime import datetime
+from pathlib import Path
+import logging
+import os
+import uuid
+
+from sqlalchemy import event, select, update, delete, func
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert
+
+from database import DIALECT_INSERTS
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = Path("uploads/resumes/blobs")
+
+# session.info key: [(path, moved-aside path)] awaiting the end of the transaction
+PENDING_REMOVALS = "blobs_pending_removals"
+
+def blob_path(content_hash: str) -> Path:
+    """Sharded storage path for a SHA-256 hex digest"""
+    return BLOB_DIR / content_hash[:2] / content_hash[2:4] / content_hash
+
+def acquire_blob(dialect: str, content_hash: str, file_size: int) -> Insert:
+    """Upsert adding one reference to a blob (creating its row on first use)"""
+    from models import ResumeBlob
+
+    table = ResumeBlob.__table__
+    statement = DIALECT_INSERTS[dialect](table).values(
+        content_hash=content_hash,
+        file_path=str(blob_path(content_hash)),
+        file_size=file_size,
+        ref_count=1,
+        created_at=datetime.utcnow()
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.content_hash],
+        set_={"ref_count": table.c.ref_count + 1}
+    )
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Could not remove resume file %s: %s", path, e)
+
+def _remove_on_commit(session, path: str):
+    """Move a file aside now; it is deleted or put back when the transaction ends"""
+    moved = f"{path}.deleting-{uuid.uuid4().hex}"
+    try:
+        os.replace(path, moved)
+    except FileNotFoundError:
+        return
+    except OSError as e:
+        logger.warning("Could not remove resume file %s: %s", path, e)
+        return
+    session.info.setdefault(PENDING_REMOVALS, []).append((path, moved))
+
+@event.listens_for(Session, "after_commit")
+def _remove_released_files(session):
+    for _, moved in session.info.pop(PENDING_REMOVALS, ()):
+        _unlink(moved)
+
+@event.listens_for(Session, "after_rollback")
+def _restore_released_files(session):
+    for path, moved in session.info.pop(PENDING_REMOVALS, ()):
+        try:
+            os.replace(moved, path)
+        except OSError as e:
+            logger.warning("Could not restore resume file %s: %s", path, e)
+
+def release_resume_file(session, connection, resume):
+    """
+    Drop a deleted resume's reference to its file (sync; runs inside the
+    deleting flush) and remove the file, once the transaction commits, when
+    nothing refers to it any more
+    """
+    from models import Resume, ResumeBlob, OcrPage
+
+    if resume.content_hash is None:
+        # Stored before content addressing: re-uploads under the same name
+        # shared one path, so only remove it when no other resume uses it
+        others = connection.execute(
+            select(func.count()).select_from(Resume).where(Resume.file_path == resume.file_path)
+        ).scalar()
+        if not others:
+            _remove_on_commit(session, resume.file_path)
+        return
+
+    remaining = connection.execute(
+        update(ResumeBlob)
+        .where(ResumeBlob.content_hash == resume.content_hash)
+        .values(ref_count=ResumeBlob.ref_count - 1)
+        .returning(ResumeBlob.ref_count, ResumeBlob.file_path)
+    ).first()
+    if remaining is not None and remaining.ref_count <= 0:
+        connection.execute(delete(ResumeBlob).where(ResumeBlob.content_hash == resume.content_hash))
+        connection.execute(delete(OcrPage).where(OcrPage.content_hash == resume.content_hash))
+        _remove_on_commit(session, remaining.file_path)
@@ -0,0 +1,102 @@
+"""
+In-process caches
+
+Small helpers for caching derived data inside one worker process. Nothing
+here is shared between workers, so every entry carries a TTL that bounds how
+stale another worker's copy can get.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import logging
+import threading
+import time
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire ttl seconds after being set"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class StaleWhileRevalidateCache:
+    """
+    Async cache for values that are expensive to compute but fine to serve
+    slightly stale (dashboard aggregates).
+
+    Entries younger than ttl are served as they are. Up to max_stale seconds
+    past that they are still served immediately while one background task
+    reloads them; older or missing entries are loaded inline. Concurrent
+    callers of the same key share a single load (a SingleFlight group
+    named after the cache, so its counters show in the service metrics).
+    """
+
+    def __init__(self, ttl: float, max_stale: float, name: str = "cache"):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._loads = SingleFlight(name)
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, calling loader() to (re)compute it when needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            loaded_at, value = entry
+            age = time.monotonic() - loaded_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.max_stale:
+                self._loads.start(key, lambda: self._run(key, loader))
+                return value
+        return await self._loads.do(key, lambda: self._run(key, loader))
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    async def _run(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception as e:
+            logger.warning("Cache refresh failed: %s", e)
+            raise
+        self._entries[key] = (time.monotonic(), value)
+        return value
@@ -0,0 +1,24 @@
+"""
+Job catalog version
+
+A counter bumped whenever jobs are created, changed, closed or deleted.
+Caches derived from the catalog put the version in their keys, so one bump
+retires every stale entry without tracking which entries a change touched.
+
+The counter lives in this process only; other workers see the change once
+their cached entries expire (see cache.TTLCache).
+"""
+
+import itertools
+
+_versions = itertools.count(1)
+_version = 0
+
+def catalog_version() -> int:
+    return _version
+
+def bump_catalog_version() -> int:
+    """Call after committing any change to the job catalog"""
+    global _version
+    _version = next(_versions)
+    return _version
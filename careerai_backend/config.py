@@ -11,6 +11,44 @@ class Settings(BaseSettings):
     jwt_expiration_hours: int = 24
     refresh_token_expiration_days: int = 7
     
+    # Authenticated principal (id, role, status) cache, per worker process
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_size: int = 10000
+    
+    # Password hashing (changing bcrypt_rounds rehashes users on their next login)
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 256
+    
+    # Job recommendations (cached per resume and job catalog version)
+    recommendation_cache_ttl_seconds: int = 300
+    recommendation_cache_size: int = 1024
+    recommendation_index_cache_size: int = 8
+    
+    # Public job list pages: cached per worker and by shared caches for the TTL
+    job_list_cache_ttl_seconds: int = 30
+    job_list_cache_size: int = 512
+    
+    # Admin dashboard aggregates: fresh for the TTL, then served stale while refreshing
+    admin_stats_ttl_seconds: int = 60
+    admin_stats_max_stale_seconds: int = 600
+    
+    # Background recount of Job.applicant_count from job_applications (0 disables)
+    applicant_count_reconcile_interval_seconds: int = 3600
+    
+    # Resume uploads
+    max_resume_upload_bytes: int = 10 * 1024 * 1024
+    
+    # Background resume text extraction: worker processes (PDF/DOCX reading, OCR per page)
+    extraction_workers: int = 2
+    # A resume still processing this long after it was claimed is assumed
+    # abandoned (its process died) and queued again on the next startup
+    extraction_lease_seconds: int = 1800
+    
+    # OCR of scanned PDF pages: render resolution and worker processes (0 = one per CPU core)
+    ocr_dpi: int = 300
+    ocr_workers: int = 0
+    
     # Server
     debug: bool = True
     allowed_origins: str = "http://localhost:3000,http://localhost:5173"
@@ -23,6 +61,15 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = None
     gemini_api_key: Optional[str] = None
     
+    # LLM gateway (llm_gateway.py): "stub" answers locally and deterministically, "gemini" calls Gemini
+    llm_provider: str = "stub"
+    llm_model: str = "gemini-2.5-flash"
+    llm_timeout_seconds: float = 30.0
+    llm_max_concurrency: int = 4
+    llm_max_retries: int = 3
+    llm_backoff_base_seconds: float = 1.0
+    llm_backoff_max_seconds: float = 20.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
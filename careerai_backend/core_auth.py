@@ -1,6 +1,10 @@
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from config import settings
@@ -10,9 +14,90 @@ from config import settings
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12
+    bcrypt__rounds=getattr(settings, "bcrypt_rounds", 12)
 )
 
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the password hashing queue is full"""
+
+class PasswordHasher:
+    """
+    Bounded worker pool for bcrypt work.
+    
+    bcrypt releases the GIL, so a small thread pool keeps hashing off the
+    event loop while capping how many hashes run at once. Requests beyond
+    the queue limit are rejected instead of piling up behind the pool.
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+    
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result"""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._queued += 1
+        enqueued_at = time.perf_counter()
+        
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait += time.perf_counter() - enqueued_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+        
+        future = self._executor.submit(task)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Drop work that never started so it does not count as queued forever
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+    
+    def metrics(self) -> dict:
+        """Snapshot of pool utilisation and queue depth"""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._total_wait / started * 1000, 2) if started else 0.0,
+            }
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(
+    max_workers=getattr(settings, "password_hash_workers", 4),
+    max_queue=getattr(settings, "password_hash_max_queue", 256)
+)
+
+def _truncate_password(password: str) -> str:
+    # Bcrypt has a 72-byte limit; truncate password if needed
+    password_bytes = password.encode('utf-8')[:72]
+    return password_bytes.decode('utf-8', errors='ignore')
+
 class AuthService:
     """Service for authentication-related operations"""
     
@@ -21,9 +106,7 @@ class AuthService:
         """Hash a password using bcrypt (truncates to 72 bytes if needed)"""
         if not password:
             raise ValueError("Password cannot be empty")
-        # Bcrypt has a 72-byte limit; truncate password if needed
-        password_bytes = password.encode('utf-8')[:72]
-        return pwd_context.hash(password_bytes.decode('utf-8', errors='ignore'))
+        return pwd_context.hash(_truncate_password(password))
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,8 +114,31 @@ class AuthService:
         if not plain_password:
             return False
         # Apply same truncation as hash_password
-        password_bytes = plain_password.encode('utf-8')[:72]
-        return pwd_context.verify(password_bytes.decode('utf-8', errors='ignore'), hashed_password)
+        return pwd_context.verify(_truncate_password(plain_password), hashed_password)
+    
+    @staticmethod
+    def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and return a replacement hash when the stored one
+        was made with a different bcrypt cost than currently configured
+        """
+        if not plain_password:
+            return False, None
+        return pwd_context.verify_and_update(_truncate_password(plain_password), hashed_password)
+    
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Hash a password on the bcrypt worker pool"""
+        if not password:
+            raise ValueError("Password cannot be empty")
+        return await password_hasher.run(AuthService.hash_password, password)
+    
+    @staticmethod
+    async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify (and possibly rehash) a password on the bcrypt worker pool"""
+        if not plain_password:
+            return False, None
+        return await password_hasher.run(AuthService.verify_and_update, plain_password, hashed_password)
     
     @staticmethod
     def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
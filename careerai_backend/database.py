@@ -1,4 +1,7 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import OperationalError
 from config import settings
@@ -32,13 +35,54 @@ except Exception as e:
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for each sync dialect we may end up on after the fallback above
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _to_async_url(url: URL) -> URL:
+    """Swap the sync DBAPI driver of a resolved engine URL for its asyncio counterpart"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def _make_async_engine(url: URL):
+    options = {"echo": getattr(settings, 'debug', False), "pool_pre_ping": True}
+    if url.get_backend_name() != "sqlite":
+        options["pool_recycle"] = 3600
+    return create_async_engine(url, **options)
+
+# Async engine bound to the same database the sync engine resolved to
+async_engine = _make_async_engine(_to_async_url(engine.url))
+
+# Async session factory; objects stay readable after commit so handlers can serialize them
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# insert() constructs with ON CONFLICT support, by dialect name
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 # Base class for models
 Base = declarative_base()
 
-# Dependency to get database session
+# Dependency to get database session (sync - for scripts and CLI tools)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# Dependency to get async database session (used by the API routers)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
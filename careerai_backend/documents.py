@@ -0,0 +1,189 @@
+"""
+Resume document text extraction and parsing
+
+Plain functions with no application state, so they can run in worker
+processes (see extraction.py):
+
+- PDFs are read from their text layer with poppler's pdftotext, one string
+  per page. Pages with (almost) no text are scans and go through OCR one
+  page at a time (see ocr.py): pdf2image renders the page, pytesseract
+  reads it.
+- DOCX files are read natively with python-docx (paragraphs, then tables).
+- parse_resume_text splits the text into sections and pulls out contact
+  details, experience and education entries.
+"""
+
+from typing import Dict, List, Optional
+import re
+import subprocess
+
+PDF_TYPES = {"application/pdf"}
+DOCX_TYPES = {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+
+# Pages with less text than this are treated as scanned images
+MIN_PAGE_CHARS = 20
+PDFTOTEXT_TIMEOUT_SECONDS = 60
+
+class ExtractionError(RuntimeError):
+    """The document could not be read"""
+
+# ===================== READING =====================
+
+def pdf_text_pages(path: str) -> List[str]:
+    """Text layer of each PDF page (pdftotext separates pages with form feeds)"""
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", path, "-"],
+            capture_output=True,
+            timeout=PDFTOTEXT_TIMEOUT_SECONDS
+        )
+    except FileNotFoundError:
+        raise ExtractionError("pdftotext (poppler-utils) is not installed")
+    except subprocess.TimeoutExpired:
+        raise ExtractionError("Timed out reading the PDF text layer")
+    if result.returncode != 0:
+        raise ExtractionError(
+            f"Unreadable PDF: {result.stderr.decode('utf-8', 'replace').strip()[:200]}"
+        )
+    pages = result.stdout.decode("utf-8", "replace").split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()  # after the final page break
+    return pages
+
+def needs_ocr(page_text: str) -> bool:
+    return len(page_text.strip()) < MIN_PAGE_CHARS
+
+def _ocr_modules():
+    try:
+        import pdf2image
+        import pytesseract
+    except ImportError as e:
+        raise ExtractionError(f"OCR is not available: {e}")
+    return pdf2image, pytesseract
+
+def ocr_engine_version() -> str:
+    """Versions of everything that affects OCR output, for cache keys"""
+    pdf2image, pytesseract = _ocr_modules()
+    try:
+        tesseract = pytesseract.get_tesseract_version()
+    except pytesseract.TesseractNotFoundError:
+        raise ExtractionError("OCR is not available: tesseract is not installed")
+    return f"tesseract-{tesseract}"
+
+def ocr_page(path: str, page_number: int, dpi: int) -> str:
+    """Render one PDF page (1-based) at dpi and OCR it"""
+    pdf2image, pytesseract = _ocr_modules()
+    images = pdf2image.convert_from_path(
+        path, dpi=dpi, first_page=page_number, last_page=page_number,
+        grayscale=True, thread_count=1
+    )
+    return pytesseract.image_to_string(images[0]) if images else ""
+
+def docx_text(path: str) -> str:
+    """Paragraph and table text of a DOCX file"""
+    try:
+        import docx
+    except ImportError:
+        raise ExtractionError("python-docx is not installed")
+
+    try:
+        document = docx.Document(path)
+    except Exception as e:
+        raise ExtractionError(f"Unreadable DOCX: {e}")
+    lines = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            lines.append("  ".join(cell.text for cell in row.cells))
+    return "\n".join(lines)
+
+# ===================== PARSING =====================
+
+SECTION_HEADINGS = {
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history", "work history", "internships"),
+    "education": ("education", "academic background", "academics", "qualifications", "education and training"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "tools"),
+    "projects": ("projects", "personal projects", "academic projects"),
+    "certifications": ("certifications", "certificates", "licenses"),
+    "summary": ("summary", "profile", "objective", "about me", "professional summary"),
+}
+_HEADING_NAMES = {
+    heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings
+}
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<!\w)\+?\d[\d\s().-]{7,}\d(?!\w)")
+_LINKEDIN = re.compile(r"(?:https?://)?(?:www\.)?linkedin\.com/[\w\-/%]+", re.I)
+_GITHUB = re.compile(r"(?:https?://)?(?:www\.)?github\.com/[\w\-]+", re.I)
+_BULLET = re.compile(r"^[\s•●▪\-*–·]+")
+_YEARS = re.compile(r"\b(?:19|20)\d{2}\b")
+
+def _heading(line: str) -> Optional[str]:
+    key = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if len(key) > 40:
+        return None
+    return _HEADING_NAMES.get(key)
+
+def split_sections(text: str) -> Dict[str, List[str]]:
+    """Lines of each recognized section ("header" holds everything before the first)"""
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for raw in text.splitlines():
+        line = raw.strip()
+        section = _heading(line) if line else None
+        if section:
+            current = section
+            sections.setdefault(current, [])
+        else:
+            sections[current].append(line)
+    return sections
+
+def _entries(lines: List[str]) -> List[dict]:
+    """
+    Group section lines into entries: a blank line or a new non-bullet
+    line after bullets starts the next one; the first line is the title
+    """
+    entries, current = [], []
+    had_bullets = False
+
+    def flush():
+        if current:
+            entry = {"title": current[0], "details": current[1:]}
+            years = _YEARS.findall(" ".join(current[:2]))
+            if years:
+                entry["years"] = years
+            entries.append(entry)
+
+    for line in lines:
+        is_bullet = bool(_BULLET.match(line)) and not line[:1].isalnum()
+        text = _BULLET.sub("", line).strip()
+        if not text or (had_bullets and not is_bullet):
+            flush()
+            current, had_bullets = [], False
+            if not text:
+                continue
+        current.append(text)
+        had_bullets = had_bullets or is_bullet
+    flush()
+    return entries
+
+def extract_contact(text: str) -> dict:
+    contact = {}
+    for key, pattern in (("email", _EMAIL), ("linkedin", _LINKEDIN), ("github", _GITHUB)):
+        match = pattern.search(text)
+        if match:
+            contact[key] = match.group(0)
+    for match in _PHONE.finditer(text):
+        digits = re.sub(r"\D", "", match.group(0))
+        if 10 <= len(digits) <= 15:  # not a date range like "2019 - 2022"
+            contact["phone"] = match.group(0).strip()
+            break
+    return contact
+
+def parse_resume_text(text: str) -> dict:
+    """Contact details, experience and education entries parsed from resume text"""
+    sections = split_sections(text)
+    return {
+        "extracted_contact": extract_contact(text) or None,
+        "extracted_experience": _entries(sections.get("experience", [])),
+        "extracted_education": _entries(sections.get("education", [])),
+    }
@@ -0,0 +1,260 @@
+"""
+Background resume text extraction
+
+Uploads return as soon as the file is stored, with the resume marked
+pending. A fixed number of worker coroutines take resume ids off a queue
+and fill in extracted_text, extracted_skills, extracted_experience,
+extracted_education and extracted_contact:
+
+- PDF: the text layer of every page is read first; only pages without
+  usable text are OCRed, in parallel and cached per page (see ocr.py).
+- DOCX: read natively with python-docx.
+
+All document work (documents.py) runs in the process pool, off the event
+loop. The resume moves pending -> processing -> completed | failed; the
+claim is a conditional UPDATE, so a queued resume is processed once even
+when it is queued twice, and records when it was taken. Resumes still
+pending at startup (queued when a process stopped, or uploaded before
+extraction existed) are queued again, as are ones whose claim is older than
+extraction_lease_seconds; younger claims may belong to another live process
+(several workers, rolling restarts) and are left to it.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+import multiprocessing
+
+from sqlalchemy import select, update, or_
+
+import documents
+import ocr
+from config import settings
+from database import AsyncSessionLocal
+from models import Resume, ExtractionStatus
+from taxonomy import get_taxonomy
+
+logger = logging.getLogger(__name__)
+
+EXTRACTED_FIELDS = (
+    "extracted_text", "extracted_skills", "extracted_experience",
+    "extracted_education", "extracted_contact",
+)
+MAX_ERROR_LENGTH = 500
+
+_pool: Optional[ProcessPoolExecutor] = None
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_listeners: Dict[str, Set[asyncio.Event]] = {}
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.extraction_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+async def _in_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+
+# ===================== EXTRACTION =====================
+
+async def extract_pdf_text(path: str, content_hash: Optional[str] = None) -> str:
+    """Text layer per page, with pages lacking one OCRed in parallel"""
+    pages = await _in_pool(documents.pdf_text_pages, path)
+    scanned = [number for number, text in enumerate(pages, start=1) if documents.needs_ocr(text)]
+    if not scanned:
+        return "\n".join(pages)
+
+    try:
+        results = await ocr.ocr_pages(path, scanned, content_hash)
+    except documents.ExtractionError as e:
+        results = dict.fromkeys(scanned, e)  # OCR not installed
+    errors = []
+    for number, result in results.items():
+        if isinstance(result, BaseException):
+            errors.append(result)
+        else:
+            pages[number - 1] = result
+    text = "\n".join(pages)
+    if errors:
+        if not text.strip():
+            raise errors[0]
+        logger.warning("OCR failed on %d of %d scanned pages of %s: %s", len(errors), len(scanned), path, errors[0])
+    return text
+
+async def extract_document(path: str, file_type: str, content_hash: Optional[str] = None) -> dict:
+    """Values for the extracted_* fields of a resume file"""
+    if file_type in documents.PDF_TYPES:
+        text = await extract_pdf_text(path, content_hash)
+    elif file_type in documents.DOCX_TYPES:
+        text = await _in_pool(documents.docx_text, path)
+    else:
+        raise documents.ExtractionError(f"Unsupported file type {file_type}")
+
+    text = text.strip()
+    if not text:
+        raise documents.ExtractionError("No text found in the document")
+
+    taxonomy = get_taxonomy()
+    return {
+        "extracted_text": text,
+        "extracted_skills": taxonomy.canonicalize_list(taxonomy.extract(text)),
+        **documents.parse_resume_text(text),
+    }
+
+async def run_extraction(resume_id: str):
+    """Claim a pending resume, extract its file and store the result"""
+    async with AsyncSessionLocal() as db:
+        started_at = datetime.utcnow()
+        claimed = (await db.execute(
+            update(Resume)
+            .where(Resume.id == resume_id, Resume.extraction_status == ExtractionStatus.PENDING.value)
+            .values(
+                extraction_status=ExtractionStatus.PROCESSING.value,
+                extraction_error=None,
+                extraction_started_at=started_at
+            )
+            .returning(Resume.file_path, Resume.file_type, Resume.content_hash)
+        )).first()
+        await db.commit()
+        if claimed is None:
+            return  # deleted, or taken by another worker
+        _notify(resume_id)
+        # Later writes only land while the claim is still ours (not re-queued
+        # after the lease ran out and taken by another process)
+        ours = (Resume.id == resume_id, Resume.extraction_started_at == started_at)
+
+        values = None
+        if claimed.content_hash:
+            # Identical content extracted since this one was queued
+            earlier = (await db.execute(
+                select(Resume).where(
+                    Resume.content_hash == claimed.content_hash,
+                    Resume.extraction_status == ExtractionStatus.COMPLETED.value,
+                    Resume.extracted_text.isnot(None)
+                ).limit(1)
+            )).scalars().first()
+            if earlier:
+                values = {field: getattr(earlier, field) for field in EXTRACTED_FIELDS}
+
+        try:
+            if values is None:
+                values = await extract_document(claimed.file_path, claimed.file_type, claimed.content_hash)
+            values["extraction_status"] = ExtractionStatus.COMPLETED.value
+        except asyncio.CancelledError:
+            # Shutting down: leave it to be picked up on the next start
+            await db.execute(
+                update(Resume).where(*ours)
+                .values(extraction_status=ExtractionStatus.PENDING.value)
+            )
+            await db.commit()
+            raise
+        except Exception as e:
+            logger.warning("Extraction failed for resume %s: %s", resume_id, e)
+            values = {
+                "extraction_status": ExtractionStatus.FAILED.value,
+                "extraction_error": (str(e) or type(e).__name__)[:MAX_ERROR_LENGTH],
+            }
+
+        await db.execute(update(Resume).where(*ours).values(**values))
+        await db.commit()
+    _notify(resume_id)
+
+# ===================== QUEUE =====================
+
+async def _work():
+    while True:
+        resume_id = await _queue.get()
+        try:
+            await run_extraction(resume_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Extraction worker error for resume %s: %s", resume_id, e)
+        finally:
+            _queue.task_done()
+
+def _ensure_workers():
+    global _queue
+
+    if _queue is None:
+        _queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        _workers.extend(loop.create_task(_work()) for _ in range(max(1, settings.extraction_workers)))
+
+def schedule_extraction(resume_id: str):
+    """Queue a pending resume for extraction (call after its row is committed)"""
+    _ensure_workers()
+    _queue.put_nowait(resume_id)
+
+async def start_extraction():
+    """Start the workers and queue resumes left pending or interrupted"""
+    _ensure_workers()
+    async with AsyncSessionLocal() as db:
+        # Left processing by a process that died mid-extraction; newer claims
+        # may be live in another process
+        expired = datetime.utcnow() - timedelta(seconds=settings.extraction_lease_seconds)
+        await db.execute(
+            update(Resume)
+            .where(
+                Resume.extraction_status == ExtractionStatus.PROCESSING.value,
+                or_(Resume.extraction_started_at.is_(None), Resume.extraction_started_at < expired)
+            )
+            .values(extraction_status=ExtractionStatus.PENDING.value)
+        )
+        await db.commit()
+        pending = (await db.execute(
+            select(Resume.id)
+            .where(Resume.extraction_status == ExtractionStatus.PENDING.value)
+            .order_by(Resume.uploaded_at)
+        )).scalars().all()
+    for resume_id in pending:
+        _queue.put_nowait(resume_id)
+    if pending:
+        logger.info("Queued %d resumes for text extraction", len(pending))
+
+async def stop_extraction():
+    global _queue, _pool
+
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    ocr.shutdown()
+
+# ===================== STATUS UPDATES =====================
+
+def _notify(resume_id: str):
+    for event in _listeners.get(resume_id, ()):
+        event.set()
+
+async def wait_for_change(resume_id: str, timeout: float) -> bool:
+    """
+    Wait until this process updates the resume's extraction status, or the
+    timeout passes (callers re-read the row either way, which also covers
+    updates made by other processes); returns whether it was notified
+    """
+    event = asyncio.Event()
+    _listeners.setdefault(resume_id, set()).add(event)
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        listeners = _listeners.get(resume_id)
+        if listeners is not None:
+            listeners.discard(event)
+            if not listeners:
+                del _listeners[resume_id]
@@ -0,0 +1,47 @@
+"""
+HTTP caching helpers
+
+ETags and conditional request checks, so read endpoints can answer 304
+Not Modified before loading or serializing what the client already has,
+plus a serialized-response holder for in-process response caches.
+"""
+
+from dataclasses import dataclass
+import hashlib
+
+from fastapi import Request, Response
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that determine a representation"""
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether a GET can be answered with 304 (If-None-Match, weak comparison as for GET)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+def not_modified(headers: dict) -> Response:
+    """304 carrying the validators and Cache-Control of the full response"""
+    return Response(status_code=304, headers=headers)
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A serialized JSON body and its ETag (the hash of the body)"""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_json(cls, body: bytes) -> "CachedResponse":
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    def respond(self, request: Request, cache_control: str) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if is_not_modified(request, self.etag):
+            return not_modified(headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
@@ -0,0 +1,214 @@
+"""
+Server-side LLM gateway
+
+Every model call goes through one gateway per worker process, so the API
+key stays on the server and load on the provider is bounded in one place:
+
+- one pooled httpx.AsyncClient (keep-alive connections, shared timeouts)
+- a semaphore capping concurrent calls to the provider
+- coalescing: identical requests in flight at the same time share a call
+- retries of rate limits (429), server errors and transport failures with
+  full-jitter exponential backoff, honouring Retry-After
+
+Providers (settings.llm_provider):
+
+    stub    deterministic local responses, no network (default; tests, dev)
+    gemini  Google Gemini generateContent with settings.gemini_api_key
+
+The stub answers each task with the handler registered for it through
+stub_response(); handlers get the request, including its context (the
+structured inputs the prompt was built from), and must be deterministic.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import json
+import logging
+import random
+
+import httpx
+
+from config import settings
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class LLMError(RuntimeError):
+    """The model call failed or returned something unusable"""
+
+class RetryableLLMError(LLMError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+@dataclass(frozen=True)
+class LLMRequest:
+    task: str  # what is asked (also picks the stub handler)
+    prompt: str
+    system: Optional[str] = None
+    context: Dict[str, Any] = field(default_factory=dict, compare=False, hash=False)
+
+    def key(self) -> str:
+        """Identity for coalescing: same task, instructions and inputs"""
+        return json.dumps(
+            [self.task, self.system, self.prompt, self.context], sort_keys=True, default=str
+        )
+
+# ===================== PROVIDERS =====================
+
+_stub_handlers: Dict[str, Callable[[LLMRequest], Any]] = {}
+
+def stub_response(task: str):
+    """Register the stub provider's deterministic answer for a task"""
+    def register(handler: Callable[[LLMRequest], Any]):
+        _stub_handlers[task] = handler
+        return handler
+    return register
+
+class StubProvider:
+    name = "stub"
+    model_name = "stub"
+
+    async def generate(self, request: LLMRequest) -> str:
+        handler = _stub_handlers.get(request.task)
+        if handler is None:
+            raise LLMError(f"No stub response for task {request.task!r}")
+        return json.dumps(handler(request))
+
+class GeminiProvider:
+    name = "gemini"
+    URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+    def __init__(self, client: httpx.AsyncClient, api_key: str, model: str):
+        self.client = client
+        self.api_key = api_key
+        self.model = model
+        self.model_name = f"gemini/{model}"
+
+    async def generate(self, request: LLMRequest) -> str:
+        body = {
+            "contents": [{"role": "user", "parts": [{"text": request.prompt}]}],
+            "generationConfig": {"responseMimeType": "application/json", "temperature": 0.2},
+        }
+        if request.system:
+            body["systemInstruction"] = {"parts": [{"text": request.system}]}
+        try:
+            response = await self.client.post(
+                self.URL.format(model=self.model),
+                params={"key": self.api_key},
+                json=body
+            )
+        except httpx.TransportError as e:
+            raise RetryableLLMError(f"{type(e).__name__}: {e}")
+
+        if response.status_code in RETRY_STATUSES:
+            raise RetryableLLMError(
+                f"Gemini returned {response.status_code}",
+                retry_after=_retry_after(response)
+            )
+        if response.status_code != 200:
+            raise LLMError(f"Gemini returned {response.status_code}: {response.text[:200]}")
+
+        try:
+            parts = response.json()["candidates"][0]["content"]["parts"]
+        except (ValueError, KeyError, IndexError):
+            raise LLMError("Gemini returned no candidates")
+        return "".join(part.get("text", "") for part in parts)
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+# ===================== GATEWAY =====================
+
+class LLMGateway:
+    def __init__(
+        self,
+        provider,
+        max_concurrency: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.provider = provider
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._limit = asyncio.Semaphore(max_concurrency)
+        self._flights = SingleFlight("llm")
+
+    async def generate_json(self, request: LLMRequest) -> Any:
+        """Parsed JSON answer to a request"""
+        text = await self.generate(request)
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise LLMError(f"{self.provider.name} returned invalid JSON for {request.task}")
+
+    async def generate(self, request: LLMRequest) -> str:
+        """Raw answer to a request, sharing the call with identical requests in flight"""
+        return await self._flights.do(request.key(), lambda: self._call(request))
+
+    async def _call(self, request: LLMRequest) -> str:
+        attempt = 0
+        while True:
+            try:
+                async with self._limit:
+                    return await self.provider.generate(request)
+            except RetryableLLMError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if e.retry_after is not None:
+                    delay = max(delay, min(e.retry_after, self.backoff_max))
+                attempt += 1
+                logger.info(
+                    "%s call for %s failed (%s); retry %d/%d in %.1fs",
+                    self.provider.name, request.task, e, attempt, self.max_retries, delay
+                )
+                await asyncio.sleep(delay)
+
+_client: Optional[httpx.AsyncClient] = None
+_gateway: Optional[LLMGateway] = None
+
+def get_gateway() -> LLMGateway:
+    """The process-wide gateway for settings.llm_provider"""
+    global _client, _gateway
+
+    if _gateway is None:
+        if settings.llm_provider == "gemini":
+            if not settings.gemini_api_key:
+                raise LLMError("LLM_PROVIDER=gemini needs GEMINI_API_KEY")
+            _client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_concurrency,
+                    max_keepalive_connections=settings.llm_max_concurrency
+                )
+            )
+            provider = GeminiProvider(_client, settings.gemini_api_key, settings.llm_model)
+        elif settings.llm_provider == "stub":
+            provider = StubProvider()
+        else:
+            raise LLMError(f"Unknown LLM provider {settings.llm_provider!r}")
+        _gateway = LLMGateway(
+            provider,
+            max_concurrency=settings.llm_max_concurrency,
+            max_retries=settings.llm_max_retries,
+            backoff_base=settings.llm_backoff_base_seconds,
+            backoff_max=settings.llm_backoff_max_seconds
+        )
+    return _gateway
+
+async def close_gateway():
+    global _client, _gateway
+
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _gateway = None
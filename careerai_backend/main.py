@@ -7,19 +7,35 @@ from datetime import datetime
 import logging
 
 from config import settings
-from database import get_db, engine, Base
+from database import get_db, engine, async_engine, Base
+from core_auth import password_hasher
+from migrations import run_migrations
+from search import configure_job_search
+from taxonomy import configure_taxonomy
+from maintenance import start_maintenance, stop_maintenance
+from extraction import start_extraction, stop_extraction
+from llm_gateway import close_gateway
 from routers import auth, users, jobs, resumes, applications, analysis, admin, interviews
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables (gracefully handle if DB is unavailable)
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database initialized successfully")
-except Exception as e:
-    logger.warning(f"Could not initialize database: {e}. API will run without persistence.")
+def init_database():
+    """
+    Create tables, apply migrations and pick the search and taxonomy backends
+    (gracefully handle if DB is unavailable). Runs on startup rather than at
+    import: worker processes spawned for extraction and OCR import this
+    module again when it was started as a script.
+    """
+    try:
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        configure_job_search(engine)
+        configure_taxonomy(engine)
+        logger.info("Database initialized successfully")
+    except Exception as e:
+        logger.warning(f"Could not initialize database: {e}. API will run without persistence.")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -54,7 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Total-Count", "X-Total-Pages"]
+    expose_headers=["X-Total-Count", "X-Total-Pages", "X-Next-Cursor", "ETag"]
 )
 
 # Exception handlers
@@ -77,6 +93,25 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         content={"detail": exc.detail},
     )
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Initialize the database, then start periodic maintenance (applicant count reconciliation) and resume extraction"""
+    init_database()
+    start_maintenance()
+    try:
+        await start_extraction()
+    except Exception as e:
+        logger.warning(f"Could not queue pending resume extractions: {e}")
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    """Stop background tasks, close pooled async database and LLM connections and worker pools"""
+    await stop_maintenance()
+    await stop_extraction()
+    await close_gateway()
+    await async_engine.dispose()
+    password_hasher.shutdown()
+
 # Health check endpoint
 @app.get("/health", tags=["Health"])
 async def health_check():
@@ -0,0 +1,76 @@
+"""
+Periodic maintenance
+
+Job.applicant_count is a denormalized counter kept in step by atomic
+increments and decrements on apply and withdraw. Paths that remove
+applications in bulk (deleting a student or a job) do not adjust it, so a
+background task recomputes every counter from job_applications in one
+UPDATE at a fixed interval, touching only the jobs whose count drifted.
+"""
+
+from typing import Iterable, Optional
+import asyncio
+import logging
+
+from sqlalchemy import select, update, func
+from sqlalchemy.sql import Update
+
+from config import settings
+from database import async_engine
+from models import Job, JobApplication
+
+logger = logging.getLogger(__name__)
+
+def applicant_count_update(job_ids: Optional[Iterable[str]] = None) -> Update:
+    """UPDATE setting applicant_count to the real count, for drifted jobs (or just job_ids)"""
+    actual = (
+        select(func.count())
+        .where(JobApplication.job_id == Job.id)
+        .scalar_subquery()
+    )
+    statement = (
+        update(Job)
+        .where(Job.applicant_count.is_distinct_from(actual))
+        # A counter fix is not an edit of the posting
+        .values(applicant_count=actual, updated_at=Job.updated_at)
+    )
+    if job_ids is not None:
+        statement = statement.where(Job.id.in_(list(job_ids)))
+    return statement
+
+async def reconcile_applicant_counts() -> int:
+    """Recompute drifted applicant counts; returns the number of jobs fixed"""
+    async with async_engine.begin() as conn:
+        result = await conn.execute(applicant_count_update())
+    return result.rowcount
+
+async def _reconcile_forever(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            fixed = await reconcile_applicant_counts()
+            if fixed:
+                logger.info("Reconciled applicant counts for %d jobs", fixed)
+        except Exception as e:
+            logger.warning("Applicant count reconciliation failed: %s", e)
+
+_task: Optional[asyncio.Task] = None
+
+def start_maintenance():
+    """Start the periodic tasks on the running event loop (interval 0 disables)"""
+    global _task
+
+    interval = settings.applicant_count_reconcile_interval_seconds
+    if interval > 0 and _task is None:
+        _task = asyncio.get_running_loop().create_task(_reconcile_forever(interval))
+
+async def stop_maintenance():
+    global _task
+
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,272 @@
+"""
+Skill matching engine
+
+Candidate skills (Resume.extracted_skills / User.skills) and job requirements
+are encoded as sparse vectors over one shared skill vocabulary. A catalog of
+jobs becomes a CSR matrix whose entries are IDF weights (rare skills count
+for more than ones every posting asks for), so ranking a candidate against
+every job is a single sparse matrix-vector product:
+
+    relevance = 100 * (J @ candidate) / row_weight(J)
+
+i.e. the weighted share of each job's requirements the candidate covers.
+
+Relevance depends on the rest of the catalog and only orders jobs. The match
+score reported for a candidate and a job (MatchResult.score, score_candidates)
+is the unweighted share of the job's skills the candidate has, which depends
+on the two of them alone: every endpoint reports the same number for the
+same resume and job, whatever else is in the catalog.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import re
+
+import numpy as np
+from scipy import sparse
+
+from taxonomy import get_taxonomy
+
+# Longest multi-word skill name looked for inside a requirement sentence
+MAX_SKILL_WORDS = 3
+
+# Requirement lists mix bare skills ("Docker") with sentences
+# ("3+ years of experience with Python and Django"); split sentences into
+# parts and drop the filler words around the skill names
+_PART_SEPARATORS = re.compile(r"[,;()]|\band\b|\bor\b|&")
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:[.\-/][a-z0-9+#]+)*")
+_COUNT = re.compile(r"^\d+\+?$")
+_FILLER_WORDS = frozenset("""
+    a an the of in with for to on at using use
+    strong good solid excellent basic deep working hands-on
+    knowledge experience experienced proficiency proficient familiarity familiar
+    understanding skills skill ability years year yrs plus
+    required preferred must have is are be
+""".split())
+
+def _tokens(text: str) -> List[str]:
+    return [
+        token for token in _TOKEN.findall(text.lower())
+        if token not in _FILLER_WORDS and not _COUNT.match(token)
+    ]
+
+def normalize_skill(skill: str) -> str:
+    """Canonical vocabulary key for a skill name ("  Node.JS " -> "node.js")"""
+    return " ".join(_tokens(skill))
+
+def _skill_parts(items: Iterable[str]) -> Iterable[Tuple[str, List[str]]]:
+    """
+    (display text, tokens) for every non-empty part of every item. Parts that
+    are a known taxonomy alias come out as the canonical skill, and sentences
+    also yield every taxonomy skill they mention.
+    """
+    taxonomy = get_taxonomy()
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        for part in _PART_SEPARATORS.split(item):
+            tokens = _tokens(part)
+            if not tokens:
+                continue
+            canonical = taxonomy.canonical_name(" ".join(tokens))
+            if canonical:
+                yield canonical, _tokens(canonical)
+                continue
+            yield part.strip(), tokens
+            if len(tokens) > MAX_SKILL_WORDS:
+                for name in taxonomy.extract(part):
+                    yield name, _tokens(name)
+
+class SkillVocabulary:
+    """Bidirectional mapping between normalized skill keys and column ids"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def add(self, key: str, display: Optional[str] = None) -> int:
+        """Column id for key, adding it (with a display name) if new"""
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = self._ids[key] = len(self._names)
+            self._names.append(display or key)
+        return term_id
+
+    def get(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def keys(self) -> List[str]:
+        return list(self._ids)
+
+    def name(self, term_id: int) -> str:
+        return self._names[term_id]
+
+    def learn(self, items: Iterable[str]):
+        """Add every short part of items (bare skill names) as a term"""
+        for display, tokens in _skill_parts(items):
+            if len(tokens) <= MAX_SKILL_WORDS:
+                self.add(" ".join(tokens), display)
+
+    def encode(self, items: Iterable[str]) -> List[int]:
+        """
+        Term ids named by items, in order and without duplicates. Every run
+        of up to MAX_SKILL_WORDS words in each part is looked up, so
+        sentences contribute the vocabulary skills they mention and whether
+        a skill is found does not depend on which other skills are known;
+        unknown words are ignored.
+        """
+        found: Dict[int, None] = {}
+        for _, tokens in _skill_parts(items):
+            for i in range(len(tokens)):
+                for width in range(1, min(MAX_SKILL_WORDS, len(tokens) - i) + 1):
+                    term_id = self._ids.get(" ".join(tokens[i:i + width]))
+                    if term_id is not None:
+                        found[term_id] = None
+        return list(found)
+
+def skill_key(skill: str) -> str:
+    """Normalized key of one skill, canonicalized through the taxonomy"""
+    tokens = _tokens(skill)
+    canonical = get_taxonomy().canonical_name(" ".join(tokens))
+    return normalize_skill(canonical) if canonical else " ".join(tokens)
+
+def job_skill_keys(requirements: Optional[List[str]]) -> List[str]:
+    """Normalized keys of the skills a job's requirements name (job_skills rows)"""
+    vocabulary = SkillVocabulary()
+    vocabulary.learn(requirements or [])
+    return vocabulary.keys()
+
+class MatchResult(NamedTuple):
+    score: float  # 0-100, unweighted share of the job's skills covered
+    matched_skills: List[str]
+    missing_skills: List[str]
+
+class JobSkillMatrix:
+    """
+    Jobs x skills CSR matrix with IDF weights
+
+    Build once per job catalog, then score any number of candidates against
+    it; each row keeps the order jobs were given in.
+    """
+
+    def __init__(self, job_ids: Sequence, terms: Sequence[List[int]], vocabulary: SkillVocabulary):
+        self.job_ids = list(job_ids)
+        self.vocabulary = vocabulary
+
+        n_jobs, n_terms = len(self.job_ids), max(len(vocabulary), 1)
+        lengths = np.fromiter((len(row) for row in terms), dtype=np.int64, count=n_jobs)
+        indptr = np.zeros(n_jobs + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter(
+            (term_id for row in terms for term_id in row), dtype=np.int32, count=int(indptr[-1])
+        )
+
+        # Smoothed IDF: a skill every job asks for still weighs 1.0
+        doc_freq = np.bincount(indices, minlength=n_terms)
+        self.idf = np.log((1.0 + n_jobs) / (1.0 + doc_freq)) + 1.0
+
+        self.matrix = sparse.csr_matrix(
+            (self.idf[indices], indices, indptr), shape=(n_jobs, n_terms)
+        )
+        self.row_weight = np.asarray(self.matrix.sum(axis=1)).ravel()
+
+    @classmethod
+    def build(cls, jobs: Iterable[Tuple[object, Optional[List[str]]]]) -> "JobSkillMatrix":
+        """
+        Build from (job_id, requirements) pairs. Each row holds the skills
+        its own requirements name (its job_skill_keys), never skills learned
+        from other postings, so a job's row is the same in any catalog.
+        """
+        vocabulary = SkillVocabulary()
+        job_ids, terms = [], []
+        for job_id, requirements in jobs:
+            own = SkillVocabulary()
+            own.learn(requirements or [])
+            job_ids.append(job_id)
+            terms.append([
+                vocabulary.add(key, own.name(term_id)) for term_id, key in enumerate(own.keys())
+            ])
+        return cls(job_ids, terms, vocabulary)
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def candidate_vector(self, skills: Optional[Iterable[str]]) -> np.ndarray:
+        """Dense 0/1 vector of the vocabulary skills a candidate has"""
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float64)
+        term_ids = self.vocabulary.encode(skills or [])
+        if term_ids:
+            vector[term_ids] = 1.0
+        return vector
+
+    def scores(self, candidate: np.ndarray) -> np.ndarray:
+        """IDF-weighted relevance (0-100) of the candidate vector to every job"""
+        covered = self.matrix @ candidate
+        scores = np.zeros(len(self.job_ids), dtype=np.float64)
+        np.divide(covered, self.row_weight, out=scores, where=self.row_weight > 0)
+        return scores * 100.0
+
+    def top_k(self, candidate: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """(row, relevance) of the k most relevant jobs, best first"""
+        scores = self.scores(candidate)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        rows = np.argpartition(-scores, k - 1)[:k]
+        rows = rows[np.lexsort((rows, -scores[rows]))]
+        return [(int(row), float(scores[row])) for row in rows]
+
+    def match(self, row: int, candidate: np.ndarray) -> MatchResult:
+        """
+        Score one job and split its skills into matched and missing, most
+        important (highest weight) first
+        """
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        weights = self.matrix.data[start:end]
+        order = np.argsort(-weights, kind="stable")
+        term_ids = self.matrix.indices[start:end][order]
+        have = candidate[term_ids] > 0
+
+        score = 100.0 * int(have.sum()) / len(term_ids) if len(term_ids) else 0.0
+        name = self.vocabulary.name
+        return MatchResult(
+            round(score, 1),
+            [name(t) for t in term_ids[have]],
+            [name(t) for t in term_ids[~have]]
+        )
+
+def match_skills(candidate_skills: Optional[List[str]], requirements: Optional[List[str]]) -> MatchResult:
+    """Score one candidate against one job's requirements"""
+    index = JobSkillMatrix.build([(None, requirements)])
+    return index.match(0, index.candidate_vector(candidate_skills))
+
+def score_candidates(
+    requirements: Optional[List[str]],
+    candidates: Sequence[Optional[List[str]]]
+) -> np.ndarray:
+    """
+    Match scores (0-100, same as match_skills) of many candidates against one
+    job, as one sparse candidates x skills product with the job's skills
+    """
+    index = JobSkillMatrix.build([(None, requirements)])
+    required = index.matrix.nnz
+    if not required or not len(candidates):
+        return np.zeros(len(candidates), dtype=np.float64)
+
+    rows, cols = [], []
+    for i, skills in enumerate(candidates):
+        term_ids = index.vocabulary.encode(skills or [])
+        rows.extend([i] * len(term_ids))
+        cols.extend(term_ids)
+    candidate_matrix = sparse.csr_matrix(
+        (np.ones(len(cols)), (rows, cols)), shape=(len(candidates), index.matrix.shape[1])
+    )
+
+    covered = candidate_matrix @ (index.matrix.toarray().ravel() > 0).astype(np.float64)
+    # Rounded like MatchResult.score so both report the same number
+    return np.array([round(100.0 * int(count) / required, 1) for count in covered], dtype=np.float64)
@@ -0,0 +1,359 @@
+"""
+Lightweight schema migrations
+
+Base.metadata.create_all creates missing tables but never alters existing
+ones. Each migration below is an idempotent step that is applied once per
+database and recorded in the schema_migrations table, so existing installs
+pick up new columns, indexes and search structures on startup while fresh
+databases (already complete after create_all) simply record them.
+"""
+
+from datetime import datetime
+import logging
+import uuid
+
+from sqlalchemy import MetaData, Table, Column, String, DateTime, inspect, select, insert, update, delete, func, case
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+_migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("name", String, primary_key=True),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+# ===================== HELPERS =====================
+
+def _has_table(conn: Connection, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+def _create_indexes(conn: Connection, model, *names: str):
+    """Create model- (or Table-) declared indexes that an older database is missing"""
+    table = getattr(model, "__table__", model)
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+def _add_columns(conn: Connection, model, *names: str):
+    """ALTER TABLE ADD COLUMN for model-declared columns an older database is missing"""
+    table = model.__table__
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            column = table.c[name]
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table.name} ADD COLUMN {name} {column.type.compile(conn.dialect)}"
+            )
+
+# ===================== MIGRATIONS =====================
+
+def _job_search_index(conn: Connection):
+    """Full-text index over job title and description"""
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql":
+        conn.exec_driver_sql(
+            "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_jobs_search_vector ON jobs USING GIN (search_vector)"
+        )
+
+    elif dialect == "sqlite":
+        # Standalone FTS5 table keyed by job id (jobs has no INTEGER PRIMARY KEY,
+        # so its rowids are not stable enough for an external-content table)
+        created = not _has_table(conn, "jobs_fts")
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+            "job_id UNINDEXED, title, description, tokenize = 'porter unicode61')"
+        )
+        conn.exec_driver_sql(
+            "CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN "
+            "INSERT INTO jobs_fts (job_id, title, description) "
+            "VALUES (new.id, new.title, new.description); END"
+        )
+        conn.exec_driver_sql(
+            "CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN "
+            "DELETE FROM jobs_fts WHERE job_id = old.id; END"
+        )
+        conn.exec_driver_sql(
+            "CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF title, description ON jobs BEGIN "
+            "DELETE FROM jobs_fts WHERE job_id = old.id; "
+            "INSERT INTO jobs_fts (job_id, title, description) "
+            "VALUES (new.id, new.title, new.description); END"
+        )
+        if created:
+            conn.exec_driver_sql(
+                "INSERT INTO jobs_fts (job_id, title, description) "
+                "SELECT id, title, description FROM jobs"
+            )
+
+    else:
+        logger.info("No full-text index available for dialect %s; keyword search will use LIKE", dialect)
+
+def _keyset_pagination_indexes(conn: Connection):
+    """Composite (timestamp, id) indexes backing cursor pagination"""
+    from models import User, Job, JobApplication
+
+    _create_indexes(conn, User, "ix_users_created_at_id")
+    _create_indexes(conn, Job, "ix_jobs_active_posted_date_id", "ix_jobs_posted_by_posted_date_id")
+    _create_indexes(conn, JobApplication, "ix_job_applications_applied_date_id")
+
+def _applicant_match_score_index(conn: Connection):
+    """(job_id, match_score) index for applicant lists sorted by match"""
+    from models import JobApplication
+
+    _create_indexes(conn, JobApplication, "ix_job_applications_job_id_match_score")
+
+def _seed_skill_taxonomy(conn: Connection):
+    """Built-in skills and aliases for the taxonomy (existing rows are kept)"""
+    from models import Skill, SkillAlias
+    from taxonomy import DEFAULT_SKILLS, EXACT_MATCH_ALIASES, normalize_alias
+
+    SkillAlias.__table__.create(conn, checkfirst=True)
+
+    skill_ids = {
+        name.lower(): skill_id
+        for skill_id, name in conn.execute(select(Skill.id, Skill.name))
+    }
+    known_aliases = set(conn.execute(select(SkillAlias.alias)).scalars())
+    now = datetime.utcnow()
+
+    for name, category, aliases in DEFAULT_SKILLS:
+        skill_id = skill_ids.get(name.lower())
+        if skill_id is None:
+            skill_id = skill_ids[name.lower()] = str(uuid.uuid4())
+            conn.execute(insert(Skill).values(id=skill_id, name=name, category=category, created_at=now))
+        for alias in map(normalize_alias, aliases):
+            if alias not in known_aliases:
+                known_aliases.add(alias)
+                conn.execute(insert(SkillAlias).values(
+                    id=str(uuid.uuid4()), alias=alias, skill_id=skill_id,
+                    exact_match=alias in EXACT_MATCH_ALIASES, created_at=now
+                ))
+
+def _job_skills_index(conn: Connection):
+    """Index job_skills and fill it from every job's requirements"""
+    from models import job_skills
+    from skill_index import rebuild_job_skills
+
+    # Nothing wrote this table before, so start from a clean slate
+    conn.execute(delete(job_skills))
+    _create_indexes(conn, job_skills, "ix_job_skills_skill_job_id", "ix_job_skills_job_id_skill")
+    jobs = rebuild_job_skills(conn)
+    logger.info("Indexed skills for %d jobs", jobs)
+
+def _interview_application_index(conn: Connection):
+    """Index interview_results.application_id for per-application and joined lookups"""
+    from models import InterviewResult
+
+    _create_indexes(conn, InterviewResult, "ix_interview_results_application_id")
+
+def _dedupe_applications(conn: Connection) -> int:
+    """
+    Keep the earliest application of every (job, student) pair, moving the
+    interview results of the extra ones onto it; returns rows removed
+    """
+    from models import JobApplication, InterviewResult
+    from maintenance import applicant_count_update
+
+    pairs = conn.execute(
+        select(JobApplication.job_id, JobApplication.user_id)
+        .group_by(JobApplication.job_id, JobApplication.user_id)
+        .having(func.count() > 1)
+    ).all()
+
+    removed = 0
+    for job_id, user_id in pairs:
+        keep, *extra = conn.execute(
+            select(JobApplication.id)
+            .where(JobApplication.job_id == job_id, JobApplication.user_id == user_id)
+            .order_by(JobApplication.applied_date, JobApplication.id)
+        ).scalars().all()
+        conn.execute(
+            update(InterviewResult)
+            .where(InterviewResult.application_id.in_(extra))
+            .values(application_id=keep)
+        )
+        conn.execute(delete(JobApplication).where(JobApplication.id.in_(extra)))
+        removed += len(extra)
+
+    job_ids = list({job_id for job_id, _ in pairs})
+    if job_ids:
+        conn.execute(applicant_count_update(job_ids))
+    return removed
+
+def _hot_path_indexes(conn: Connection):
+    """Foreign-key and listing indexes, and one application per (job, student)"""
+    from models import User, Resume, ResumeAnalysis, JobApplication
+
+    removed = _dedupe_applications(conn)
+    if removed:
+        logger.info("Removed %d duplicate job applications", removed)
+
+    _create_indexes(conn, User, "ix_users_role_status_created_at")
+    _create_indexes(conn, Resume, "ix_resumes_user_id_uploaded_at")
+    _create_indexes(
+        conn, ResumeAnalysis,
+        "ix_resume_analyses_resume_id_analyzed_at", "ix_resume_analyses_job_id"
+    )
+    _create_indexes(
+        conn, JobApplication,
+        "uq_job_applications_job_id_user_id",
+        "ix_job_applications_job_id_applied_date_id",
+        "ix_job_applications_user_id_applied_date",
+        "ix_job_applications_resume_id",
+    )
+
+def _daily_stats(conn: Connection):
+    """Daily activity rollups, backfilled from existing users, jobs and applications"""
+    from models import DailyStat
+    from rollups import rebuild_daily_stats
+
+    DailyStat.__table__.create(conn, checkfirst=True)
+    counters = rebuild_daily_stats(conn)
+    logger.info("Backfilled %d daily activity counters", counters)
+
+def _resume_content_hash(conn: Connection):
+    """SHA-256 of each uploaded resume file"""
+    from models import Resume
+
+    _add_columns(conn, Resume, "content_hash")
+
+def _resume_blobs(conn: Connection):
+    """Reference-counted content-addressed resume files"""
+    from models import Resume, ResumeBlob
+
+    ResumeBlob.__table__.create(conn, checkfirst=True)
+    _create_indexes(conn, Resume, "ix_resumes_content_hash")
+
+def _resume_extraction_status(conn: Connection):
+    """
+    Background text extraction state; resumes uploaded before the pipeline
+    existed are queued for extraction on the next start
+    """
+    from models import Resume, ExtractionStatus
+
+    _add_columns(conn, Resume, "extraction_status", "extraction_error")
+    _create_indexes(conn, Resume, "ix_resumes_extraction_status")
+    conn.execute(
+        update(Resume).where(Resume.extraction_status.is_(None)).values(
+            extraction_status=case(
+                (Resume.extracted_text.isnot(None), ExtractionStatus.COMPLETED.value),
+                else_=ExtractionStatus.PENDING.value
+            )
+        )
+    )
+
+def _ocr_pages(conn: Connection):
+    """Per-page OCR text cache"""
+    from models import OcrPage
+
+    OcrPage.__table__.create(conn, checkfirst=True)
+
+def _analysis_memoization(conn: Connection):
+    """Memoization key of resume analyses"""
+    from models import ResumeAnalysis
+
+    _add_columns(conn, ResumeAnalysis, "input_hash", "job_updated_at")
+    _create_indexes(conn, ResumeAnalysis, "ix_resume_analyses_memo")
+
+def _job_description_excerpt(conn: Connection):
+    """Precomputed description excerpts for job cards"""
+    from models import Job, description_excerpt
+
+    _add_columns(conn, Job, "description_excerpt")
+    rows = conn.execute(
+        select(Job.id, Job.description).where(Job.description_excerpt.is_(None))
+    ).all()
+    for job_id, description in rows:
+        conn.execute(
+            update(Job).where(Job.id == job_id)
+            .values(description_excerpt=description_excerpt(description))
+        )
+    logger.info("Backfilled %d job description excerpts", len(rows))
+
+def _exact_match_aliases(conn: Connection):
+    """
+    Keep ambiguous aliases out of free-text extraction: the seeded ones that
+    are ordinary words become exact-match only, and "github"/"gitlab" no
+    longer mean Git. job_skills is rebuilt since requirement sentences were
+    scanned with the old aliases.
+    """
+    from models import Skill, SkillAlias
+    from skill_index import rebuild_job_skills
+    from taxonomy import EXACT_MATCH_ALIASES
+
+    _add_columns(conn, SkillAlias, "exact_match")
+    conn.execute(
+        update(SkillAlias).values(exact_match=SkillAlias.alias.in_(EXACT_MATCH_ALIASES))
+    )
+    git = select(Skill.id).where(Skill.name == "Git").scalar_subquery()
+    conn.execute(
+        delete(SkillAlias).where(SkillAlias.alias.in_(("github", "gitlab")), SkillAlias.skill_id == git)
+    )
+    jobs = rebuild_job_skills(conn)
+    logger.info("Rebuilt job_skills for %d jobs", jobs)
+
+def _extraction_claim_time(conn: Connection):
+    """
+    When each extraction claim was taken, so startup only re-queues expired
+    claims. Resumes processing now get the current time: their lease starts
+    with this version.
+    """
+    from models import Resume, ExtractionStatus
+
+    _add_columns(conn, Resume, "extraction_started_at")
+    conn.execute(
+        update(Resume).where(
+            Resume.extraction_status == ExtractionStatus.PROCESSING.value,
+            Resume.extraction_started_at.is_(None)
+        ).values(extraction_started_at=datetime.utcnow())
+    )
+
+# Ordered list of (name, step); never rename or reorder applied entries
+MIGRATIONS = [
+    ("0001_job_search_index", _job_search_index),
+    ("0002_keyset_pagination_indexes", _keyset_pagination_indexes),
+    ("0003_applicant_match_score_index", _applicant_match_score_index),
+    ("0004_seed_skill_taxonomy", _seed_skill_taxonomy),
+    ("0005_job_skills_index", _job_skills_index),
+    ("0006_interview_application_index", _interview_application_index),
+    ("0007_hot_path_indexes", _hot_path_indexes),
+    ("0008_daily_stats", _daily_stats),
+    ("0009_resume_content_hash", _resume_content_hash),
+    ("0010_resume_blobs", _resume_blobs),
+    ("0011_resume_extraction_status", _resume_extraction_status),
+    ("0012_ocr_pages", _ocr_pages),
+    ("0013_analysis_memoization", _analysis_memoization),
+    ("0014_job_description_excerpt", _job_description_excerpt),
+    ("0015_exact_match_aliases", _exact_match_aliases),
+    ("0016_extraction_claim_time", _extraction_claim_time),
+]
+
+def run_migrations(engine):
+    """Apply any migrations this database has not seen yet"""
+    _migration_metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+
+    for name, step in MIGRATIONS:
+        if name in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                step(conn)
+                conn.execute(insert(schema_migrations).values(name=name, applied_at=datetime.utcnow()))
+            logger.info("Applied migration %s", name)
+        except Exception as e:
+            # Leave it unrecorded so it is retried on the next start
+            logger.warning("Migration %s failed: %s", name, e)
@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum as PyEnum
 import uuid
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, Float, Boolean, JSON, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Enum, ForeignKey, Float, Boolean, JSON, Table, Index
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import relationship, object_session
 from database import Base
 
 # Enums
@@ -33,12 +34,21 @@ class UserStatus(str, PyEnum):
     PENDING = "Pending"
     SUSPENDED = "Suspended"
 
-# Association table for job skills
+class ExtractionStatus(str, PyEnum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+# Association table for job skills: one row per normalized skill key a job
+# requires, maintained from Job.requirements (see skill_index.py)
 job_skills = Table(
     'job_skills',
     Base.metadata,
     Column('job_id', String, ForeignKey('jobs.id')),
-    Column('skill', String)
+    Column('skill', String),
+    Index("ix_job_skills_skill_job_id", "skill", "job_id"),
+    Index("ix_job_skills_job_id_skill", "job_id", "skill", unique=True)
 )
 
 # User Model
@@ -74,6 +84,13 @@ class User(Base):
     resumes = relationship("Resume", back_populates="user", cascade="all, delete-orphan")
     applications = relationship("JobApplication", back_populates="user", cascade="all, delete-orphan")
     posted_jobs = relationship("Job", back_populates="employer", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination of admin user listings (newest first)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Admin pending-approval and role/status listings
+        Index("ix_users_role_status_created_at", "role", "status", "created_at"),
+    )
 
 # Job Model
 class Job(Base):
@@ -87,6 +104,7 @@ class Job(Base):
     salary_range = Column(String, nullable=True)
     company_name = Column(String, nullable=False, index=True)
     company_description = Column(Text, nullable=True)
+    description_excerpt = Column(String, nullable=True)  # Set from description on write
     logo_url = Column(String, nullable=True)
     cover_url = Column(String, nullable=True)
     requirements = Column(JSON, default=[], nullable=True)  # Array of required skills
@@ -99,6 +117,48 @@ class Job(Base):
     # Relationships
     employer = relationship("User", back_populates="posted_jobs")
     applications = relationship("JobApplication", back_populates="job", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination of public and employer job listings (newest first)
+        Index("ix_jobs_active_posted_date_id", "is_active", "posted_date", "id"),
+        Index("ix_jobs_posted_by_posted_date_id", "posted_by", "posted_date", "id"),
+    )
+
+DESCRIPTION_EXCERPT_LENGTH = 200
+
+def description_excerpt(text: str, length: int = DESCRIPTION_EXCERPT_LENGTH) -> str:
+    """Whitespace-collapsed start of a description, cut at a word boundary"""
+    text = " ".join((text or "").split())
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" ,.;:-") + "…"
+
+# Job cards show the excerpt, so list pages never have to read the description
+@event.listens_for(Job, "before_insert")
+def _set_description_excerpt(mapper, connection, target):
+    target.description_excerpt = description_excerpt(target.description)
+
+@event.listens_for(Job, "before_update")
+def _update_description_excerpt(mapper, connection, target):
+    if inspect(target).attrs.description.history.has_changes():
+        target.description_excerpt = description_excerpt(target.description)
+
+# Keep job_skills in step with Job.requirements
+@event.listens_for(Job, "after_insert")
+def _insert_job_skills(mapper, connection, target):
+    from skill_index import replace_job_skills
+    replace_job_skills(connection, [(target.id, target.requirements)])
+
+@event.listens_for(Job, "after_update")
+def _update_job_skills(mapper, connection, target):
+    if inspect(target).attrs.requirements.history.has_changes():
+        from skill_index import replace_job_skills
+        replace_job_skills(connection, [(target.id, target.requirements)])
+
+@event.listens_for(Job, "before_delete")
+def _delete_job_skills(mapper, connection, target):
+    connection.execute(job_skills.delete().where(job_skills.c.job_id == target.id))
 
 # Resume Model
 class Resume(Base):
@@ -110,6 +170,7 @@ class Resume(Base):
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
     file_type = Column(String, nullable=False)  # pdf, docx, etc.
+    content_hash = Column(String, nullable=True)  # SHA-256 hex of the file
     
     # Extracted information
     extracted_text = Column(Text, nullable=True)
@@ -117,6 +178,9 @@ class Resume(Base):
     extracted_experience = Column(JSON, default=[], nullable=True)
     extracted_education = Column(JSON, default=[], nullable=True)
     extracted_contact = Column(JSON, nullable=True)
+    extraction_status = Column(String, default=ExtractionStatus.PENDING.value, nullable=True)  # see extraction.py
+    extraction_error = Column(String, nullable=True)
+    extraction_started_at = Column(DateTime, nullable=True)  # when the current claim was taken
     
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     is_primary = Column(Boolean, default=False)
@@ -124,6 +188,42 @@ class Resume(Base):
     # Relationships
     user = relationship("User", back_populates="resumes")
     analyses = relationship("ResumeAnalysis", back_populates="resume", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # A user's resumes, newest first
+        Index("ix_resumes_user_id_uploaded_at", "user_id", "uploaded_at"),
+        # Earlier uploads of the same content (extraction and analysis reuse)
+        Index("ix_resumes_content_hash", "content_hash"),
+        # Queued extractions, picked up again on startup
+        Index("ix_resumes_extraction_status", "extraction_status"),
+    )
+
+# Release the stored file when a resume is deleted (directly or with its user)
+@event.listens_for(Resume, "after_delete")
+def _release_resume_file(mapper, connection, target):
+    from blobs import release_resume_file
+    release_resume_file(object_session(target), connection, target)
+
+# Resume Blob Model (one stored file per distinct content, see blobs.py)
+class ResumeBlob(Base):
+    __tablename__ = "resume_blobs"
+    
+    content_hash = Column(String, primary_key=True)  # SHA-256 hex
+    file_path = Column(String, nullable=False)
+    file_size = Column(Integer, nullable=False)  # in bytes
+    ref_count = Column(Integer, nullable=False, default=0)  # resumes using this file
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+# OCR Page Cache Model (text of one scanned page per rendering setup, see ocr.py)
+class OcrPage(Base):
+    __tablename__ = "ocr_pages"
+    
+    content_hash = Column(String, primary_key=True)  # SHA-256 of the resume file
+    page = Column(Integer, primary_key=True)  # 1-based
+    dpi = Column(Integer, primary_key=True)
+    engine_version = Column(String, primary_key=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 # Resume Analysis Model
 class ResumeAnalysis(Base):
@@ -145,8 +245,22 @@ class ResumeAnalysis(Base):
     analyzed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     analysis_version = Column(String, default="1.0")  # For tracking model versions
     
+    # Memoization key (see routers/analysis.py): hash of the inputs and the
+    # job's updated_at when the analysis was made
+    input_hash = Column(String, nullable=True)
+    job_updated_at = Column(DateTime, nullable=True)
+    
     # Relationships
     resume = relationship("Resume", back_populates="analyses")
+    
+    __table_args__ = (
+        # Analysis history of a resume, newest first
+        Index("ix_resume_analyses_resume_id_analyzed_at", "resume_id", "analyzed_at"),
+        # Foreign-key checks when a job is deleted
+        Index("ix_resume_analyses_job_id", "job_id"),
+        # Stored analysis for the same inputs, job version and analysis version
+        Index("ix_resume_analyses_memo", "input_hash", "analysis_version", "job_id", "job_updated_at"),
+    )
 
 # Job Application Model
 class JobApplication(Base):
@@ -181,6 +295,21 @@ class JobApplication(Base):
     # Relationships
     job = relationship("Job", back_populates="applications")
     user = relationship("User", back_populates="applications")
+    
+    __table_args__ = (
+        # Keyset pagination of admin application listings (newest first)
+        Index("ix_job_applications_applied_date_id", "applied_date", "id"),
+        # Employer applicant lists ranked by match score
+        Index("ix_job_applications_job_id_match_score", "job_id", "match_score"),
+        # One application per student and job (also serves lookups by job)
+        Index("uq_job_applications_job_id_user_id", "job_id", "user_id", unique=True),
+        # Employer applicant lists, newest first
+        Index("ix_job_applications_job_id_applied_date_id", "job_id", "applied_date", "id"),
+        # A student's applications, newest first
+        Index("ix_job_applications_user_id_applied_date", "user_id", "applied_date"),
+        # Foreign-key checks when a resume is deleted
+        Index("ix_job_applications_resume_id", "resume_id"),
+    )
 
 # Skill Model (for skill database/taxonomy)
 class Skill(Base):
@@ -193,6 +322,25 @@ class Skill(Base):
     proficiency_levels = Column(JSON, default=["Beginner", "Intermediate", "Advanced", "Expert"])
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    aliases = relationship("SkillAlias", back_populates="skill", cascade="all, delete-orphan")
+
+# Skill Alias Model (alternative spellings mapped to a canonical skill)
+class SkillAlias(Base):
+    __tablename__ = "skill_aliases"
+    
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    alias = Column(String, unique=True, nullable=False, index=True)  # lowercase, e.g. "reactjs"
+    skill_id = Column(String, ForeignKey("skills.id"), nullable=False, index=True)
+    # Ordinary words ("spring", "rest"): canonicalize an exact skill entry but
+    # are never searched for in free text
+    exact_match = Column(Boolean, default=False, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    skill = relationship("Skill", back_populates="aliases")
 
 # Career Path Model (for recommendations)
 class CareerPath(Base):
@@ -214,7 +362,7 @@ class InterviewResult(Base):
     __tablename__ = "interview_results"
     
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    application_id = Column(String, ForeignKey("job_applications.id"), nullable=False)
+    application_id = Column(String, ForeignKey("job_applications.id"), nullable=False, index=True)
     
     # Interview metadata
     interview_date = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -246,3 +394,35 @@ class InterviewResult(Base):
     
     # Relationship
     application = relationship("JobApplication", back_populates="ai_interview_results")
+
+# Daily Activity Rollup Model (per-day event counters, see rollups.py)
+class DailyStat(Base):
+    __tablename__ = "daily_stats"
+    
+    metric = Column(String, primary_key=True)  # signups, postings, postings_by_location, applications
+    day = Column(Date, primary_key=True)
+    dimension = Column(String, primary_key=True, default="")  # role, job type, location or status
+    count = Column(Integer, nullable=False, default=0)
+
+# Keep daily_stats in step with signups, postings and application status changes
+@event.listens_for(User, "after_insert")
+def _count_signup(mapper, connection, target):
+    from rollups import increment
+    connection.execute(increment(connection.dialect.name, "signups", target.role, target.created_at))
+
+@event.listens_for(Job, "after_insert")
+def _count_posting(mapper, connection, target):
+    from rollups import increment
+    connection.execute(increment(connection.dialect.name, "postings", target.job_type, target.posted_date))
+    connection.execute(increment(connection.dialect.name, "postings_by_location", target.location, target.posted_date))
+
+@event.listens_for(JobApplication, "after_insert")
+def _count_application(mapper, connection, target):
+    from rollups import increment
+    connection.execute(increment(connection.dialect.name, "applications", target.status, target.applied_date))
+
+@event.listens_for(JobApplication, "after_update")
+def _count_status_change(mapper, connection, target):
+    if inspect(target).attrs.status.history.has_changes():
+        from rollups import increment
+        connection.execute(increment(connection.dialect.name, "applications", target.status))
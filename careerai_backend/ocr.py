@@ -0,0 +1,122 @@
+"""
+Page-parallel OCR of scanned resume pages
+
+Each page is rendered (pdf2image) and read (tesseract) as its own job in a
+process pool sized to the CPU cores (settings.ocr_workers), so a scanned
+resume takes about as long as its slowest page rather than the sum of all.
+
+Page text is cached in ocr_pages under (content hash, page, dpi, engine
+version). Files are stored by content, so re-extracting a resume (after a
+parser change, a retry or an identical upload) reuses every page already
+read with the same settings; changing the DPI, upgrading tesseract or
+bumping OCR_PIPELINE_VERSION (rendering or preprocessing changes) redoes
+only what those affect.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Union
+import asyncio
+import multiprocessing
+import os
+
+from sqlalchemy import select
+
+import documents
+from config import settings
+from database import AsyncSessionLocal, DIALECT_INSERTS
+from models import OcrPage
+
+# Bump when page rendering or preprocessing changes what OCR returns
+OCR_PIPELINE_VERSION = "1"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_engine_version: Optional[str] = None
+
+def worker_count() -> int:
+    return settings.ocr_workers or os.cpu_count() or 1
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=worker_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+async def _in_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+
+async def engine_version() -> str:
+    """Cache key part for the installed OCR stack (asked once, in a worker)"""
+    global _engine_version
+
+    if _engine_version is None:
+        tesseract = await _in_pool(documents.ocr_engine_version)
+        _engine_version = f"{tesseract}/pipeline-{OCR_PIPELINE_VERSION}"
+    return _engine_version
+
+async def load_cached_pages(content_hash: str, pages: Iterable[int], dpi: int, version: str) -> Dict[int, str]:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(OcrPage.page, OcrPage.text).where(
+                OcrPage.content_hash == content_hash,
+                OcrPage.page.in_(list(pages)),
+                OcrPage.dpi == dpi,
+                OcrPage.engine_version == version
+            )
+        )).all()
+    return {row.page: row.text for row in rows}
+
+async def store_pages(content_hash: str, texts: Dict[int, str], dpi: int, version: str):
+    async with AsyncSessionLocal() as db:
+        statement = DIALECT_INSERTS[db.bind.dialect.name](OcrPage).values([
+            {
+                "content_hash": content_hash, "page": page, "dpi": dpi,
+                "engine_version": version, "text": text, "created_at": datetime.utcnow()
+            }
+            for page, text in texts.items()
+        ])
+        await db.execute(statement.on_conflict_do_nothing())
+        await db.commit()
+
+async def ocr_pages(
+    path: str,
+    pages: Iterable[int],
+    content_hash: Optional[str] = None,
+    dpi: Optional[int] = None
+) -> Dict[int, Union[str, BaseException]]:
+    """
+    OCR text of each requested page (1-based), or the exception that page
+    raised; cached pages are not read again. Without a content_hash nothing
+    is cached.
+    """
+    pages = list(dict.fromkeys(pages))
+    dpi = dpi or settings.ocr_dpi
+    version = await engine_version()
+
+    results: Dict[int, Union[str, BaseException]] = {}
+    if content_hash:
+        results.update(await load_cached_pages(content_hash, pages, dpi, version))
+
+    missing = [page for page in pages if page not in results]
+    texts = await asyncio.gather(
+        *(_in_pool(documents.ocr_page, path, page, dpi) for page in missing),
+        return_exceptions=True
+    )
+    fresh = {page: text for page, text in zip(missing, texts) if not isinstance(text, BaseException)}
+    results.update(zip(missing, texts))
+
+    if content_hash and fresh:
+        await store_pages(content_hash, fresh, dpi, version)
+    return results
+
+def shutdown():
+    global _pool, _engine_version
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    _engine_version = None
@@ -0,0 +1,60 @@
+"""
+Keyset (cursor) pagination helpers
+
+Listings are ordered newest first by (timestamp, id). A cursor is an opaque
+token holding the last row's sort key, and the next page starts strictly
+after it. That is a single index range scan however deep the page is,
+instead of OFFSET walking and discarding every earlier row.
+"""
+
+from datetime import datetime
+from typing import Callable, Optional, Sequence, Tuple
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, or_
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    """Encode a row's (timestamp, id) sort key as an opaque URL-safe token"""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor (400 if it was tampered with)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_value), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def apply_keyset(query: Select, sort_column, id_column, cursor: Optional[str]) -> Select:
+    """Order newest first by (sort_column, id_column) and start after the cursor"""
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            )
+        )
+    return query.order_by(sort_column.desc(), id_column.desc())
+
+def split_page(
+    rows: Sequence,
+    limit: int,
+    cursor_key: Callable[..., Tuple[datetime, str]]
+) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with limit + 1 rows and build the cursor for the
+    next page from cursor_key(last_row) (None when this is the last page)
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*cursor_key(rows[-1]))
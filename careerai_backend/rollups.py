@@ -0,0 +1,109 @@
+"""
+Daily activity rollups
+
+daily_stats holds one counter per (metric, day, dimension):
+
+    signups               dimension = user role
+    postings              dimension = job type
+    postings_by_location  dimension = job location
+    applications          dimension = status the application entered
+                          (PENDING when submitted, then each status change)
+
+Counters are bumped in the same transaction as the write they count, with
+an INSERT ... ON CONFLICT DO UPDATE, so a time series over any range reads
+one row per day and dimension instead of scanning the underlying tables.
+They count events: deleting a user, job or application later does not
+take anything back.
+"""
+
+from collections import Counter
+from datetime import date, datetime
+from enum import Enum
+
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.sql import Insert
+
+from database import DIALECT_INSERTS
+
+METRICS = ("signups", "postings", "postings_by_location", "applications")
+
+def dimension_value(value) -> str:
+    """Dimension key for an enum member or raw value"""
+    if isinstance(value, Enum):
+        return value.value
+    return str(value).strip() if value is not None else ""
+
+def _day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return datetime.utcnow().date()
+
+def increment(dialect: str, metric: str, dimension, day=None, delta: int = 1) -> Insert:
+    """Upsert adding delta to one counter (day defaults to today, UTC)"""
+    from models import DailyStat
+
+    table = DailyStat.__table__
+    statement = DIALECT_INSERTS[dialect](table).values(
+        metric=metric, day=_day(day), dimension=dimension_value(dimension), count=delta
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.metric, table.c.day, table.c.dimension],
+        set_={"count": table.c.count + statement.excluded.count}
+    )
+
+def rebuild_daily_stats(conn) -> int:
+    """
+    Recompute every counter from the users, jobs and job_applications
+    tables (applications count once as PENDING on the day they were made,
+    plus their current status on the day they were last updated); returns
+    the number of counters written
+    """
+    from models import DailyStat, User, Job, JobApplication, ApplicationStatus
+
+    counts: Counter = Counter()
+
+    def add(metric, rows):
+        for day, dimension, n in rows:
+            counts[(metric, _day(day), dimension_value(dimension))] += n
+
+    add("signups", conn.execute(
+        select(func.date(User.created_at), User.role, func.count())
+        .group_by(func.date(User.created_at), User.role)
+    ))
+    add("postings", conn.execute(
+        select(func.date(Job.posted_date), Job.job_type, func.count())
+        .group_by(func.date(Job.posted_date), Job.job_type)
+    ))
+    add("postings_by_location", conn.execute(
+        select(func.date(Job.posted_date), Job.location, func.count())
+        .group_by(func.date(Job.posted_date), Job.location)
+    ))
+    add("applications", (
+        (day, ApplicationStatus.PENDING, n) for day, n in conn.execute(
+            select(func.date(JobApplication.applied_date), func.count())
+            .group_by(func.date(JobApplication.applied_date))
+        )
+    ))
+    add("applications", conn.execute(
+        select(
+            func.date(func.coalesce(JobApplication.updated_at, JobApplication.applied_date)),
+            JobApplication.status, func.count()
+        )
+        .where(JobApplication.status.notin_([ApplicationStatus.PENDING, ApplicationStatus.APPLIED]))
+        .group_by(
+            func.date(func.coalesce(JobApplication.updated_at, JobApplication.applied_date)),
+            JobApplication.status
+        )
+    ))
+
+    conn.execute(delete(DailyStat))
+    if counts:
+        conn.execute(insert(DailyStat), [
+            {"metric": metric, "day": day, "dimension": dimension, "count": n}
+            for (metric, day, dimension), n in counts.items()
+        ])
+    return len(counts)
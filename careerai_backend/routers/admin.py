@@ -1,25 +1,34 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from sqlalchemy import select, delete, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 
-from database import get_db
+from config import settings
+from database import get_async_db, AsyncSessionLocal
+from cache import StaleWhileRevalidateCache
+from singleflight import SingleFlight, flight_key
+import singleflight
 from models import (
-    User, Job, JobApplication, Resume,
+    User, Job, JobApplication, Resume, DailyStat,
     UserRole, UserStatus, ApplicationStatus, JobType
 )
-from routers.users import get_current_user
+from routers.users import get_current_principal, Principal, invalidate_principal
+from core_auth import password_hasher
+from pagination import apply_keyset, split_page
+from catalog import bump_catalog_version
 from schemas import (
     UserStatsResponse, JobStatsResponse,
     AnalyticsResponse, UserResponse,
+    TimeSeriesResponse, TimeSeriesPoint,
     AdminApplicationsListResponse, AdminApplicationItem
 )
 
 router = APIRouter()
 
 # Admin check dependency
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Ensure current user is an admin"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -28,112 +37,236 @@ async def require_admin(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-@router.get("/users/stats", response_model=UserStatsResponse)
-async def get_user_statistics(
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    """Get user statistics (admin only)"""
+@router.get("/metrics")
+async def get_service_metrics(admin: Principal = Depends(require_admin)):
+    """Get in-process service metrics (admin only)"""
     
-    total_users = db.query(User).count()
-    total_students = db.query(User).filter(User.role == UserRole.STUDENT).count()
-    total_employers = db.query(User).filter(User.role == UserRole.EMPLOYER).count()
-    total_admins = db.query(User).filter(User.role == UserRole.ADMIN).count()
-    active_users = db.query(User).filter(User.status == UserStatus.ACTIVE).count()
-    pending_users = db.query(User).filter(User.status == UserStatus.PENDING).count()
-    
-    return UserStatsResponse(
-        total_users=total_users,
-        total_students=total_students,
-        total_employers=total_employers,
-        total_admins=total_admins,
-        active_users=active_users,
-        pending_users=pending_users
-    )
+    return {
+        "password_hasher": password_hasher.metrics(),
+        "singleflight": singleflight.metrics()
+    }
 
-@router.get("/jobs/stats", response_model=JobStatsResponse)
-async def get_job_statistics(
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    """Get job posting statistics (admin only)"""
-    
-    total_jobs = db.query(Job).count()
-    active_jobs = db.query(Job).filter(Job.is_active == True).count()
-    total_applications = db.query(JobApplication).count()
-    
-    # Calculate average applicants per job
-    avg_applicants = db.query(func.avg(Job.applicant_count)).scalar() or 0.0
+# Dashboard aggregates are shared by every admin and served from cache
+_stats_cache = StaleWhileRevalidateCache(
+    ttl=settings.admin_stats_ttl_seconds,
+    max_stale=settings.admin_stats_max_stale_seconds,
+    name="admin_stats"
+)
+
+# Identical time series queries from concurrent dashboards run once
+_timeseries_flights = SingleFlight("admin_timeseries")
+
+async def compute_analytics(db: AsyncSession) -> AnalyticsResponse:
+    """
+    Every dashboard number in a handful of single-pass aggregate queries
+    (one per table plus the two breakdowns), using COUNT(*) FILTER (WHERE ...)
+    instead of a separate COUNT per condition
+    """
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    count = func.count
+    
+    users = (await db.execute(
+        select(
+            count(),
+            count().filter(User.role == UserRole.STUDENT),
+            count().filter(User.role == UserRole.EMPLOYER),
+            count().filter(User.role == UserRole.ADMIN),
+            count().filter(User.status == UserStatus.ACTIVE),
+            count().filter(User.status == UserStatus.PENDING),
+            count().filter(User.created_at >= thirty_days_ago),
+        ).select_from(User)
+    )).one()
+    
+    jobs = (await db.execute(
+        select(
+            count(),
+            count().filter(Job.is_active == True),
+            count().filter(Job.posted_date >= thirty_days_ago),
+            func.avg(Job.applicant_count),
+        ).select_from(Job)
+    )).one()
+    
+    applications = (await db.execute(
+        select(
+            count(),
+            count().filter(JobApplication.status == ApplicationStatus.ACCEPTED),
+        ).select_from(JobApplication)
+    )).one()
     
     # Get most popular locations
-    location_stats = db.query(
-        Job.location,
-        func.count(Job.id).label('count')
-    ).group_by(Job.location).order_by(desc('count')).limit(5).all()
-    
-    most_popular_locations = [
-        {"location": loc, "count": count}
-        for loc, count in location_stats
-    ]
+    location_stats = (await db.execute(
+        select(
+            Job.location,
+            func.count(Job.id).label('count')
+        ).group_by(Job.location).order_by(desc('count')).limit(5)
+    )).all()
     
     # Get most popular job types
-    type_stats = db.query(
-        Job.job_type,
-        func.count(Job.id).label('count')
-    ).group_by(Job.job_type).order_by(desc('count')).all()
-    
-    most_popular_job_types = [
-        {"type": jt.value, "count": count}
-        for jt, count in type_stats
-    ]
+    type_stats = (await db.execute(
+        select(
+            Job.job_type,
+            func.count(Job.id).label('count')
+        ).group_by(Job.job_type).order_by(desc('count'))
+    )).all()
     
-    return JobStatsResponse(
-        total_jobs=total_jobs,
-        active_jobs=active_jobs,
-        total_applications=total_applications,
-        avg_applicants_per_job=float(avg_applicants),
-        most_popular_locations=most_popular_locations,
-        most_popular_job_types=most_popular_job_types
+    total_apps, accepted_apps = applications
+    
+    # Calculate application conversion rate (applications to acceptances)
+    conversion_rate = (accepted_apps / total_apps * 100) if total_apps > 0 else 0.0
+    
+    return AnalyticsResponse(
+        user_stats=UserStatsResponse(
+            total_users=users[0],
+            total_students=users[1],
+            total_employers=users[2],
+            total_admins=users[3],
+            active_users=users[4],
+            pending_users=users[5]
+        ),
+        job_stats=JobStatsResponse(
+            total_jobs=jobs[0],
+            active_jobs=jobs[1],
+            total_applications=total_apps,
+            avg_applicants_per_job=float(jobs[3] or 0.0),
+            most_popular_locations=[
+                {"location": loc, "count": n}
+                for loc, n in location_stats
+            ],
+            most_popular_job_types=[
+                {"type": jt.value, "count": n}
+                for jt, n in type_stats
+            ]
+        ),
+        recent_signups=users[6],
+        recent_job_postings=jobs[2],
+        avg_application_conversion_rate=conversion_rate
     )
 
-@router.get("/analytics", response_model=AnalyticsResponse)
-async def get_analytics(
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    """Get comprehensive analytics (admin only)"""
-    
-    # Get user stats
-    user_stats = await get_user_statistics(admin, db)
+async def _load_analytics() -> AnalyticsResponse:
+    # Own session: background refreshes outlive the request that triggered them
+    async with AsyncSessionLocal() as db:
+        return await compute_analytics(db)
+
+async def get_cached_analytics() -> AnalyticsResponse:
+    return await _stats_cache.get("analytics", _load_analytics)
+
+@router.get("/users/stats", response_model=UserStatsResponse)
+async def get_user_statistics(admin: Principal = Depends(require_admin)):
+    """Get user statistics (admin only)"""
     
-    # Get job stats
-    job_stats = await get_job_statistics(admin, db)
+    return (await get_cached_analytics()).user_stats
+
+@router.get("/jobs/stats", response_model=JobStatsResponse)
+async def get_job_statistics(admin: Principal = Depends(require_admin)):
+    """Get job posting statistics (admin only)"""
     
-    # Calculate recent activity (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    return (await get_cached_analytics()).job_stats
+
+@router.get("/analytics", response_model=AnalyticsResponse)
+async def get_analytics(admin: Principal = Depends(require_admin)):
+    """
+    Get comprehensive analytics (admin only)
     
-    recent_signups = db.query(User).filter(
-        User.created_at >= thirty_days_ago
-    ).count()
+    Figures are cached for ADMIN_STATS_TTL_SECONDS and refreshed in the
+    background after that, so they can lag recent activity slightly.
+    """
     
-    recent_job_postings = db.query(Job).filter(
-        Job.posted_date >= thirty_days_ago
-    ).count()
+    return await get_cached_analytics()
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the day, week (Monday) or month bucket containing day"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+@router.get("/timeseries", response_model=TimeSeriesResponse)
+async def get_timeseries(
+    metric: str = Query(..., pattern="^(signups|postings|postings_by_location|applications)$"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    dimension: Optional[str] = Query(None),
+    admin: Principal = Depends(require_admin)
+):
+    """
+    Activity over time from the daily rollups (admin only)
     
-    # Calculate application conversion rate (applications to acceptances)
-    total_apps = db.query(JobApplication).count()
-    accepted_apps = db.query(JobApplication).filter(
-        JobApplication.status == ApplicationStatus.ACCEPTED
-    ).count()
+    **Query parameters:**
+    - metric: signups (by role), postings (by job type), postings_by_location,
+      or applications (by status entered)
+    - from / to: Inclusive date range (default: the last 30 days)
+    - bucket: day, week or month
+    - dimension: Only count this role, job type, location or status
+    
+    Every bucket in the range is returned, with zero counts where nothing
+    happened. Identical requests in flight at the same time share one query.
+    """
     
-    conversion_rate = (accepted_apps / total_apps * 100) if total_apps > 0 else 0.0
+    to_date = to_date or datetime.utcnow().date()
+    from_date = from_date or to_date - timedelta(days=29)
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'"
+        )
+    if (to_date - from_date).days > 366 * 10:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date range is limited to 10 years"
+        )
     
-    return AnalyticsResponse(
-        user_stats=user_stats,
-        job_stats=job_stats,
-        recent_signups=recent_signups,
-        recent_job_postings=recent_job_postings,
-        avg_application_conversion_rate=conversion_rate
+    return await _timeseries_flights.do(
+        flight_key("admin.timeseries", {
+            "metric": metric, "from": from_date, "to": to_date,
+            "bucket": bucket, "dimension": dimension
+        }, scope=UserRole.ADMIN),
+        lambda: compute_timeseries(metric, from_date, to_date, bucket, dimension)
+    )
+
+async def compute_timeseries(
+    metric: str,
+    from_date: date,
+    to_date: date,
+    bucket: str,
+    dimension: Optional[str]
+) -> TimeSeriesResponse:
+    query = select(DailyStat.day, DailyStat.dimension, DailyStat.count).where(
+        DailyStat.metric == metric,
+        DailyStat.day >= from_date,
+        DailyStat.day <= to_date
+    )
+    if dimension is not None:
+        query = query.where(DailyStat.dimension == dimension)
+    
+    points = {}
+    start = bucket_start(from_date, bucket)
+    while start <= to_date:
+        points[start] = TimeSeriesPoint(start=start, total=0, breakdown={})
+        start = next_bucket(start, bucket)
+    
+    # Own session: the query is shared by every caller waiting on it
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(query)).all()
+    for day, key, count in rows:
+        point = points[bucket_start(day, bucket)]
+        point.total += count
+        point.breakdown[key] = point.breakdown.get(key, 0) + count
+    
+    return TimeSeriesResponse(
+        metric=metric,
+        bucket=bucket,
+        from_date=from_date,
+        to_date=to_date,
+        points=list(points.values())
     )
 
 @router.get("/applications", response_model=AdminApplicationsListResponse)
@@ -141,56 +274,106 @@ async def admin_list_applications(
     status: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    include_total: bool = True,
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all job applications system-wide (admin only) with applicant and job details"""
+    """
+    List all job applications system-wide (admin only) with applicant and job details
+    
+    **Query parameters:**
+    - status: Filter by application status
+    - page / page_size: Offset pagination
+    - cursor: next_cursor from the previous page (keyset mode, ignores page)
+    - include_total: Count all matching applications (default: true)
+    """
+
+    base = select(JobApplication.id)
+    if status:
+        base = base.where(JobApplication.status == status)
+
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(base.subquery()))
 
-    query = db.query(JobApplication)
+    # One joined projection for the page: application, job, applicant, employer
+    Applicant = aliased(User)
+    Employer = aliased(User)
+    query = (
+        select(
+            JobApplication.id,
+            JobApplication.job_id,
+            JobApplication.user_id,
+            JobApplication.status,
+            JobApplication.applied_date,
+            JobApplication.match_score,
+            Job.title.label("job_title"),
+            Job.posted_by.label("employer_id"),
+            Applicant.first_name.label("applicant_first_name"),
+            Applicant.last_name.label("applicant_last_name"),
+            Applicant.email.label("applicant_email"),
+            Employer.first_name.label("employer_first_name"),
+            Employer.last_name.label("employer_last_name"),
+        )
+        .outerjoin(Job, Job.id == JobApplication.job_id)
+        .outerjoin(Applicant, Applicant.id == JobApplication.user_id)
+        .outerjoin(Employer, Employer.id == Job.posted_by)
+    )
     if status:
-        query = query.filter(JobApplication.status == status)
+        query = query.where(JobApplication.status == status)
 
-    total = query.count()
-    skip = (page - 1) * page_size
-    apps = query.order_by(JobApplication.applied_date.desc()).offset(skip).limit(page_size).all()
+    query = apply_keyset(query, JobApplication.applied_date, JobApplication.id, cursor)
+    if not cursor:
+        query = query.offset((page - 1) * page_size)
+    rows, next_cursor = split_page(
+        (await db.execute(query.limit(page_size + 1))).all(),
+        page_size,
+        lambda row: (row.applied_date, row.id)
+    )
 
-    items: list[AdminApplicationItem] = []
-    for app in apps:
-        job = db.query(Job).filter(Job.id == app.job_id).first()
-        user = db.query(User).filter(User.id == app.user_id).first()
-        employer_name = None
-        if job:
-            employer = db.query(User).filter(User.id == job.posted_by).first()
-            employer_name = f"{employer.first_name} {employer.last_name}" if employer else None
-        items.append(AdminApplicationItem(
-            id=app.id,
-            job_id=app.job_id,
-            job_title=job.title if job else "",
-            employer_id=job.posted_by if job else "",
-            employer_name=employer_name,
-            user_id=app.user_id,
-            applicant_name=(f"{user.first_name} {user.last_name}" if user else ""),
-            applicant_email=(user.email if user else ""),
-            status=app.status,
-            applied_date=app.applied_date,
-            match_score=app.match_score,
-        ))
+    items = [
+        AdminApplicationItem(
+            id=row.id,
+            job_id=row.job_id,
+            job_title=row.job_title or "",
+            employer_id=row.employer_id or "",
+            employer_name=(
+                f"{row.employer_first_name} {row.employer_last_name}"
+                if row.employer_first_name is not None else None
+            ),
+            user_id=row.user_id,
+            applicant_name=(
+                f"{row.applicant_first_name} {row.applicant_last_name}"
+                if row.applicant_first_name is not None else ""
+            ),
+            applicant_email=row.applicant_email or "",
+            status=row.status,
+            applied_date=row.applied_date,
+            match_score=row.match_score,
+        )
+        for row in rows
+    ]
 
     return AdminApplicationsListResponse(
         total=total,
         page=page,
         page_size=page_size,
-        applications=items
+        applications=items,
+        next_cursor=next_cursor
     )
 
 @router.get("/users", response_model=list[UserResponse])
 async def list_all_users(
+    response: Response,
     role: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    include_total: bool = False,
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all users with filtering (admin only)
@@ -198,19 +381,34 @@ async def list_all_users(
     **Query parameters:**
     - role: Filter by role (STUDENT, EMPLOYER, ADMIN)
     - status: Filter by status (ACTIVE, PENDING, SUSPENDED)
-    - skip: Number of records to skip
+    - skip: Number of records to skip (offset mode)
     - limit: Number of records to return
+    - cursor: X-Next-Cursor from the previous page (keyset mode, ignores skip)
+    - include_total: Also return the match count in X-Total-Count (default: false)
     """
     
-    query = db.query(User)
+    query = select(User)
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     
     if status:
-        query = query.filter(User.status == status)
-    
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+        query = query.where(User.status == status)
+    
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        response.headers["X-Total-Count"] = str(total)
+    
+    query = apply_keyset(query, User.created_at, User.id, cursor)
+    if not cursor:
+        query = query.offset(skip)
+    users, next_cursor = split_page(
+        (await db.execute(query.limit(limit + 1))).scalars().all(),
+        limit,
+        lambda user: (user.created_at, user.id)
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     return users
 
@@ -218,8 +416,8 @@ async def list_all_users(
 async def update_user_status(
     user_id: str,
     new_status: UserStatus,
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user account status (admin only)
@@ -231,7 +429,7 @@ async def update_user_status(
     - new_status: ACTIVE, PENDING, or SUSPENDED
     """
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -241,8 +439,9 @@ async def update_user_status(
     
     user.status = new_status
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    invalidate_principal(user_id)
+    await db.refresh(user)
     
     return {
         "message": f"User status updated to {new_status.value}",
@@ -252,12 +451,12 @@ async def update_user_status(
 @router.delete("/users/{user_id}")
 async def delete_user_admin(
     user_id: str,
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete any user account (admin only)"""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -272,20 +471,23 @@ async def delete_user_admin(
             detail="Cannot delete other admin accounts"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    invalidate_principal(user_id)
+    if user.role == UserRole.EMPLOYER:
+        bump_catalog_version()  # Their jobs were deleted with them
     
     return {"message": "User deleted successfully"}
 
 @router.delete("/jobs/{job_id}")
 async def delete_job_admin(
     job_id: str,
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete any job posting (admin only)"""
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -294,24 +496,27 @@ async def delete_job_admin(
         )
     
     # Delete associated applications
-    db.query(JobApplication).filter(JobApplication.job_id == job_id).delete()
+    await db.execute(delete(JobApplication).where(JobApplication.job_id == job_id))
     
-    db.delete(job)
-    db.commit()
+    await db.delete(job)
+    await db.commit()
+    bump_catalog_version()
     
     return {"message": "Job deleted successfully"}
 
 @router.get("/pending-approvals")
 async def get_pending_approvals(
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all pending employer approvals (admin only)"""
     
-    pending_employers = db.query(User).filter(
-        User.role == UserRole.EMPLOYER,
-        User.status == UserStatus.PENDING
-    ).order_by(User.created_at.desc()).all()
+    pending_employers = (await db.execute(
+        select(User).where(
+            User.role == UserRole.EMPLOYER,
+            User.status == UserStatus.PENDING
+        ).order_by(User.created_at.desc())
+    )).scalars().all()
     
     return {
         "total": len(pending_employers),
@@ -321,12 +526,12 @@ async def get_pending_approvals(
 @router.post("/approve-employer/{user_id}")
 async def approve_employer(
     user_id: str,
-    admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    admin: Principal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Approve a pending employer account (admin only)"""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -342,8 +547,9 @@ async def approve_employer(
     
     user.status = UserStatus.ACTIVE
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    invalidate_principal(user_id)
+    await db.refresh(user)
     
     return {
         "message": "Employer account approved",
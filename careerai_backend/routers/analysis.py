@@ -1,25 +1,97 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, case
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from datetime import datetime
+from pydantic import ValidationError
+import hashlib
 import json
 
-from database import get_db
-from models import Resume, ResumeAnalysis, Job, User, UserRole
-from routers.users import get_current_user
+from database import get_async_db
+from models import Resume, ResumeAnalysis, Job, User, UserRole, ExtractionStatus
+from routers.users import get_current_user, get_current_principal, Principal, load_user
+from matching import JobSkillMatrix, MatchResult, match_skills
+from catalog import catalog_version
+from cache import TTLCache
+from config import settings
+from llm_gateway import LLMError, LLMRequest, get_gateway, stub_response
 from schemas import (
     ResumeAnalysisResponse, JobMatchAnalysisResponse,
     CareerRecommendationResponse, CareerRoadmapResponse,
-    SkillImprovementResponse
+    SkillImprovementResponse, RecommendedJobResponse,
+    JobRecommendationsResponse, JobResponse
 )
 
 router = APIRouter()
 
-# Mock AI analysis functions (replace with actual AI service integration)
+# Skill matrices per (location, job_type, catalog version) and finished
+# recommendation lists per (resume, skills, filters, k, catalog version)
+_recommendation_indexes = TTLCache(
+    settings.recommendation_index_cache_size, settings.recommendation_cache_ttl_seconds
+)
+_recommendations = TTLCache(
+    settings.recommendation_cache_size, settings.recommendation_cache_ttl_seconds
+)
 
-def analyze_resume_content(resume_text: str) -> dict:
-    """Analyze resume and extract key information"""
-    # This would call actual AI service (OpenAI, Gemini, etc.)
+# Stored with each analysis; bump when analyze_resume_content or
+# calculate_job_match changes so results computed by the old version are no
+# longer reused
+ANALYSIS_VERSION = "1.1"
+
+# Fields an analysis result consists of (copied when reusing one)
+ANALYSIS_FIELDS = (
+    "overall_score", "match_score", "strengths", "weaknesses",
+    "missing_skills", "recommendations", "career_path_advice",
+)
+
+def analysis_input_hash(text: Optional[str], skills: Optional[List[str]] = None) -> str:
+    """SHA-256 of what an analysis is computed from: the resume text, plus the skills matched for job analyses"""
+    payload = text or ""
+    if skills is not None:
+        payload = json.dumps([payload, skills])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def find_memoized_analysis(
+    db: AsyncSession,
+    resume_id: str,
+    input_hash: str,
+    version: str,
+    job: Optional[Job] = None
+) -> Optional[ResumeAnalysis]:
+    """
+    Stored analysis with the same inputs, analysis version and job version
+    (one probe of ix_resume_analyses_memo), preferring this resume's own
+    """
+    return (await db.execute(
+        select(ResumeAnalysis)
+        .where(
+            ResumeAnalysis.input_hash == input_hash,
+            ResumeAnalysis.analysis_version == version,
+            ResumeAnalysis.job_id == (job.id if job else None),
+            ResumeAnalysis.job_updated_at == (job.updated_at if job else None)
+        )
+        .order_by(
+            case((ResumeAnalysis.resume_id == resume_id, 0), else_=1),
+            ResumeAnalysis.analyzed_at.desc()
+        )
+        .limit(1)
+    )).scalars().first()
+
+# AI analysis goes through the LLM gateway; with the stub provider (the
+# default) the sample answers registered below are returned
+
+MAX_PROMPT_RESUME_CHARS = 20000
+ANALYST_SYSTEM = (
+    "You are an expert recruiter and career coach. "
+    "Answer with a single JSON object and nothing else."
+)
+
+def _strings(value) -> List[str]:
+    return [str(item) for item in value] if isinstance(value, list) else []
+
+@stub_response("resume_analysis")
+def _sample_resume_analysis(request: LLMRequest) -> dict:
     return {
         "overall_score": 7.5,
         "strengths": [
@@ -38,34 +110,101 @@ def analyze_resume_content(resume_text: str) -> dict:
         ]
     }
 
-def calculate_job_match(resume: Resume, job: Job) -> dict:
-    """Calculate how well resume matches job requirements"""
-    # This would use AI to match skills, experience, etc.
+async def analyze_resume_content(resume_text: str) -> dict:
+    """Analyze resume and extract key information"""
+    result = await get_gateway().generate_json(LLMRequest(
+        task="resume_analysis",
+        system=ANALYST_SYSTEM,
+        prompt=(
+            "Review this resume for a general professional role. Return JSON with "
+            "overall_score (number from 0 to 10) and strengths, weaknesses and "
+            "recommendations (arrays of short sentences).\n\n"
+            f"Resume:\n{resume_text[:MAX_PROMPT_RESUME_CHARS]}"
+        )
+    ))
+    try:
+        score = min(max(float(result.get("overall_score")), 0.0), 10.0)
+    except (AttributeError, TypeError, ValueError):
+        raise LLMError("Resume analysis has no overall_score")
     return {
-        "match_score": 8.2,
-        "strengths": [
-            "Excellent match for required programming languages",
-            "Relevant project experience aligns with job description"
-        ],
-        "weaknesses": [
-            "Limited experience with specific frameworks mentioned"
-        ],
-        "missing_skills": [
-            "Docker",
-            "Kubernetes",
-            "CI/CD pipelines"
-        ],
-        "recommendations": [
-            "Highlight transferable skills from projects",
-            "Mention willingness to learn new technologies",
-            "Complete online courses in missing skills"
-        ]
+        "overall_score": score,
+        "strengths": _strings(result.get("strengths")),
+        "weaknesses": _strings(result.get("weaknesses")),
+        "recommendations": _strings(result.get("recommendations"))
     }
 
-def generate_career_recommendations(user: User, top_n: int = 5) -> List[dict]:
-    """Generate career path recommendations based on user profile"""
-    # This would use AI to analyze skills and suggest career paths
-    return [
+def calculate_job_match(resume: Resume, job: Job, profile_skills: Optional[List[str]] = None) -> dict:
+    """
+    Calculate how well resume matches job requirements
+
+    Uses the skills extracted from the resume, falling back to the skills on
+    the candidate's profile when extraction found none.
+    """
+    candidate_skills = resume.extracted_skills or profile_skills or []
+    result = match_skills(candidate_skills, job.requirements or [])
+    required = len(result.matched_skills) + len(result.missing_skills)
+    
+    strengths = []
+    if result.matched_skills:
+        strengths.append(
+            f"Matches {len(result.matched_skills)} of {required} required skills: "
+            + ", ".join(result.matched_skills[:5])
+        )
+    
+    weaknesses = []
+    if not candidate_skills:
+        weaknesses.append("No skills found on the resume or profile")
+    if result.missing_skills:
+        weaknesses.append(f"Missing {len(result.missing_skills)} of {required} required skills")
+    
+    recommendations = [f"Build experience with {skill}" for skill in result.missing_skills[:3]]
+    if result.matched_skills:
+        recommendations.append("Highlight your matching skills near the top of your resume")
+    
+    return {
+        "match_score": result.score,
+        "strengths": strengths,
+        "weaknesses": weaknesses,
+        "missing_skills": result.missing_skills,
+        "recommendations": recommendations
+    }
+
+async def get_recommendation_index(
+    db: AsyncSession,
+    location: Optional[str],
+    job_type: Optional[str]
+) -> JobSkillMatrix:
+    """Skill matrix of the active jobs passing the filters (cached per catalog version)"""
+    key = (location, job_type, catalog_version())
+    index = _recommendation_indexes.get(key)
+    
+    if index is None:
+        query = select(Job.id, Job.requirements).where(Job.is_active == True)
+        if location:
+            query = query.where(Job.location.ilike(f"%{location}%"))
+        if job_type:
+            query = query.where(Job.job_type == job_type)
+        
+        rows = (await db.execute(query)).all()
+        # Building the matrix is CPU work; keep it off the event loop
+        index = await run_in_threadpool(JobSkillMatrix.build, rows)
+        _recommendation_indexes.set(key, index)
+    
+    return index
+
+def recommendation_reason(match: MatchResult) -> str:
+    """One-line explanation of a recommendation"""
+    required = len(match.matched_skills) + len(match.missing_skills)
+    shown = ", ".join(match.matched_skills[:3])
+    if len(match.matched_skills) > 3:
+        shown += f" and {len(match.matched_skills) - 3} more"
+    if not match.missing_skills:
+        return f"You have all {required} required skills: {shown}"
+    return f"You have {len(match.matched_skills)} of {required} required skills: {shown}"
+
+@stub_response("career_recommendations")
+def _sample_career_recommendations(request: LLMRequest) -> dict:
+    return {"recommendations": [
         {
             "title": "Full Stack Developer",
             "description": "Build end-to-end web applications using modern frameworks",
@@ -77,14 +216,33 @@ def generate_career_recommendations(user: User, top_n: int = 5) -> List[dict]:
             "job_market_outlook": "Excellent - High demand across all industries",
             "time_to_proficiency": "3-6 months with focused learning"
         }
-    ]
+    ]}
 
-def create_career_roadmap(current_role: str, target_role: str, user: User) -> dict:
-    """Create a personalized career development roadmap"""
-    # This would use AI to create step-by-step plan
+async def generate_career_recommendations(user: User, top_n: int = 5) -> List[CareerRecommendationResponse]:
+    """Generate career path recommendations based on user profile"""
+    fields = ", ".join(CareerRecommendationResponse.model_fields)
+    result = await get_gateway().generate_json(LLMRequest(
+        task="career_recommendations",
+        system=ANALYST_SYSTEM,
+        prompt=(
+            f"Suggest up to {top_n} career paths for this candidate, best fit first. "
+            f"Return JSON with recommendations: an array of objects with {fields} "
+            "(match_percentage from 0 to 100).\n\n"
+            f"Skills: {', '.join(user.skills or []) or 'none listed'}\n"
+            f"Education: {user.major or 'not given'} at {user.university or 'not given'}\n"
+            f"Bio: {user.bio or 'not given'}"
+        )
+    ))
+    try:
+        return [CareerRecommendationResponse(**rec) for rec in result["recommendations"][:top_n]]
+    except (KeyError, TypeError, ValidationError) as e:
+        raise LLMError(f"Malformed career recommendations: {e}")
+
+@stub_response("career_roadmap")
+def _sample_career_roadmap(request: LLMRequest) -> dict:
     return {
-        "current_role": current_role,
-        "target_role": target_role,
+        "current_role": request.context["current_role"],
+        "target_role": request.context["target_role"],
         "estimated_timeline": "12-18 months",
         "milestones": [
             {"month": 3, "goal": "Complete advanced Python certification"},
@@ -99,22 +257,44 @@ def create_career_roadmap(current_role: str, target_role: str, user: User) -> di
         ]
     }
 
+async def create_career_roadmap(current_role: str, target_role: str, user: User) -> CareerRoadmapResponse:
+    """Create a personalized career development roadmap"""
+    result = await get_gateway().generate_json(LLMRequest(
+        task="career_roadmap",
+        system=ANALYST_SYSTEM,
+        prompt=(
+            f"Plan how this candidate can move from {current_role} to {target_role}. "
+            "Return JSON with current_role, target_role, estimated_timeline, "
+            "milestones (array of {month, goal}), required_skills_to_learn (array) "
+            "and resources (array of {name, platform, duration}).\n\n"
+            f"Skills: {', '.join(user.skills or []) or 'none listed'}"
+        ),
+        context={"current_role": current_role, "target_role": target_role}
+    ))
+    try:
+        return CareerRoadmapResponse(**result)
+    except (TypeError, ValidationError) as e:
+        raise LLMError(f"Malformed career roadmap: {e}")
+
 # Endpoints
 
 @router.post("/resume/{resume_id}/analyze", response_model=ResumeAnalysisResponse)
 async def analyze_resume(
     resume_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Analyze a resume and provide feedback
     
+    Needs the resume's text: 409 Conflict until its extraction has completed
+    (see GET /api/resumes/{resume_id}/extraction).
+    
     **Path parameters:**
     - resume_id: Resume to analyze
     """
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -128,22 +308,45 @@ async def analyze_resume(
             detail="Cannot analyze other users' resumes"
         )
     
-    # Perform AI analysis
-    analysis_result = analyze_resume_content(resume.extracted_text or "")
+    if resume.extraction_status != ExtractionStatus.COMPLETED.value or not resume.extracted_text:
+        # Nothing to analyze yet: extraction is pending, running or failed
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Resume text is not available (extraction {resume.extraction_status})"
+        )
+    
+    # Unchanged inputs: return the stored analysis. The same text analyzed
+    # for another resume: copy its result instead of recomputing it.
+    input_hash = analysis_input_hash(resume.extracted_text)
+    try:
+        version = f"{ANALYSIS_VERSION}+{get_gateway().provider.model_name}"
+        previous = await find_memoized_analysis(db, resume_id, input_hash, version)
+        if previous is not None and previous.resume_id == resume_id:
+            return previous
+        
+        if previous is not None:
+            analysis_result = {field: getattr(previous, field) for field in ANALYSIS_FIELDS}
+        else:
+            # Perform AI analysis
+            analysis_result = await analyze_resume_content(resume.extracted_text)
+    except LLMError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Resume analysis failed: {e}"
+        )
     
     # Create analysis record
     analysis = ResumeAnalysis(
         resume_id=resume_id,
-        overall_score=analysis_result["overall_score"],
-        strengths=analysis_result["strengths"],
-        weaknesses=analysis_result["weaknesses"],
-        recommendations=analysis_result["recommendations"],
-        analyzed_at=datetime.utcnow()
+        **analysis_result,
+        analyzed_at=datetime.utcnow(),
+        analysis_version=version,
+        input_hash=input_hash
     )
     
     db.add(analysis)
-    db.commit()
-    db.refresh(analysis)
+    await db.commit()
+    await db.refresh(analysis)
     
     return analysis
 
@@ -151,8 +354,8 @@ async def analyze_resume(
 async def match_resume_to_job(
     resume_id: str,
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Calculate how well a resume matches a specific job
@@ -162,7 +365,7 @@ async def match_resume_to_job(
     - job_id: Job to match against
     """
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -176,7 +379,7 @@ async def match_resume_to_job(
             detail="Cannot analyze other users' resumes"
         )
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -184,39 +387,144 @@ async def match_resume_to_job(
             detail="Job not found"
         )
     
-    # Perform job matching analysis
-    match_result = calculate_job_match(resume, job)
+    profile_skills = None
+    if not resume.extracted_skills:
+        profile_skills = (await load_user(db, current_user)).skills
+    candidate_skills = resume.extracted_skills or profile_skills or []
+    
+    # Same text and skills against this version of the job: reuse the stored
+    # result (this resume's own row as it is, another resume's as a copy)
+    input_hash = analysis_input_hash(resume.extracted_text, candidate_skills)
+    analysis = await find_memoized_analysis(db, resume_id, input_hash, ANALYSIS_VERSION, job)
+    
+    if analysis is None or analysis.resume_id != resume_id:
+        if analysis is not None:
+            analysis_result = {field: getattr(analysis, field) for field in ANALYSIS_FIELDS}
+        else:
+            # Perform job matching analysis
+            match_result = calculate_job_match(resume, job, profile_skills)
+            analysis_result = {
+                "overall_score": match_result["match_score"],
+                "match_score": match_result["match_score"],
+                "strengths": match_result["strengths"],
+                "weaknesses": match_result["weaknesses"],
+                "missing_skills": match_result["missing_skills"],
+                "recommendations": match_result["recommendations"]
+            }
+        
+        # Save analysis
+        analysis = ResumeAnalysis(
+            resume_id=resume_id,
+            job_id=job_id,
+            **analysis_result,
+            analyzed_at=datetime.utcnow(),
+            analysis_version=ANALYSIS_VERSION,
+            input_hash=input_hash,
+            job_updated_at=job.updated_at
+        )
+        
+        db.add(analysis)
+        await db.commit()
     
-    # Save analysis
-    analysis = ResumeAnalysis(
-        resume_id=resume_id,
+    return JobMatchAnalysisResponse(
         job_id=job_id,
-        match_score=match_result["match_score"],
-        strengths=match_result["strengths"],
-        weaknesses=match_result["weaknesses"],
-        missing_skills=match_result["missing_skills"],
-        recommendations=match_result["recommendations"],
-        analyzed_at=datetime.utcnow()
+        job_title=job.title,
+        match_score=analysis.match_score,
+        strengths=analysis.strengths,
+        weaknesses=analysis.weaknesses,
+        missing_skills=analysis.missing_skills,
+        recommendations=analysis.recommendations
     )
+
+@router.get("/resume/{resume_id}/recommended-jobs", response_model=JobRecommendationsResponse)
+async def get_recommended_jobs(
+    resume_id: str,
+    k: int = Query(10, ge=1, le=50),
+    location: Optional[str] = Query(None),
+    job_type: Optional[str] = Query(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Rank every active job for a resume and return the best matches
     
-    db.add(analysis)
-    db.commit()
+    Jobs are ordered by relevance, which weights rare skills above ones most
+    postings ask for; match_score is the resume's match score for the job,
+    the same one match-job reports.
     
-    return JobMatchAnalysisResponse(
-        job_id=job_id,
-        job_title=job.title,
-        match_score=match_result["match_score"],
-        strengths=match_result["strengths"],
-        weaknesses=match_result["weaknesses"],
-        missing_skills=match_result["missing_skills"],
-        recommendations=match_result["recommendations"]
+    **Path parameters:**
+    - resume_id: Resume to recommend jobs for
+    
+    **Query parameters:**
+    - k: Number of jobs to return (default: 10, max: 50)
+    - location: Only consider jobs in this location
+    - job_type: Only consider jobs of this type
+    """
+    
+    resume = await db.get(Resume, resume_id)
+    
+    if not resume:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resume not found"
+        )
+    
+    if resume.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot get recommendations for other users' resumes"
+        )
+    
+    candidate_skills = resume.extracted_skills or (await load_user(db, current_user)).skills or []
+    cache_key = (resume_id, tuple(candidate_skills), location, job_type, k, catalog_version())
+    cached = _recommendations.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    index = await get_recommendation_index(db, location, job_type)
+    candidate = index.candidate_vector(candidate_skills)
+    ranked = [(row, score) for row, score in index.top_k(candidate, k) if score > 0]
+    
+    # Load full rows for the winners only
+    jobs = {}
+    if ranked:
+        job_ids = [index.job_ids[row] for row, _ in ranked]
+        jobs = {
+            job.id: job
+            for job in (await db.execute(
+                select(Job).where(Job.id.in_(job_ids), Job.is_active == True)
+            )).scalars()
+        }
+    
+    recommendations = []
+    for row, relevance in ranked:
+        job = jobs.get(index.job_ids[row])
+        if job is None:
+            continue  # Closed or deleted since the index was built
+        match = index.match(row, candidate)
+        recommendations.append(RecommendedJobResponse(
+            job=JobResponse.model_validate(job),
+            match_score=match.score,
+            relevance=round(relevance, 1),
+            matched_skills=match.matched_skills,
+            missing_skills=match.missing_skills,
+            reason=recommendation_reason(match)
+        ))
+    
+    response = JobRecommendationsResponse(
+        resume_id=resume_id,
+        jobs_considered=len(index),
+        recommendations=recommendations
     )
+    _recommendations.set(cache_key, response)
+    
+    return response
 
 @router.get("/career-recommendations", response_model=List[CareerRecommendationResponse])
 async def get_career_recommendations(
     top_n: int = Query(5, ge=1, le=10),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get personalized career path recommendations
@@ -231,16 +539,20 @@ async def get_career_recommendations(
             detail="Only students can get career recommendations"
         )
     
-    recommendations = generate_career_recommendations(current_user, top_n)
-    
-    return [CareerRecommendationResponse(**rec) for rec in recommendations]
+    try:
+        return await generate_career_recommendations(current_user, top_n)
+    except LLMError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Career recommendations failed: {e}"
+        )
 
 @router.post("/career-roadmap", response_model=CareerRoadmapResponse)
 async def create_roadmap(
     current_role: str,
     target_role: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a personalized career development roadmap
@@ -256,14 +568,18 @@ async def create_roadmap(
             detail="Only students can create career roadmaps"
         )
     
-    roadmap = create_career_roadmap(current_role, target_role, current_user)
-    
-    return CareerRoadmapResponse(**roadmap)
+    try:
+        return await create_career_roadmap(current_role, target_role, current_user)
+    except LLMError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Career roadmap failed: {e}"
+        )
 
 @router.get("/skill-gaps")
 async def analyze_skill_gaps(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Analyze skill gaps based on job market demands
@@ -307,12 +623,12 @@ async def analyze_skill_gaps(
 @router.get("/resume/{resume_id}/history")
 async def get_analysis_history(
     resume_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all analyses for a resume"""
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -326,9 +642,11 @@ async def get_analysis_history(
             detail="Cannot access analysis history for other users' resumes"
         )
     
-    analyses = db.query(ResumeAnalysis).filter(
-        ResumeAnalysis.resume_id == resume_id
-    ).order_by(ResumeAnalysis.analyzed_at.desc()).all()
+    analyses = (await db.execute(
+        select(ResumeAnalysis).where(
+            ResumeAnalysis.resume_id == resume_id
+        ).order_by(ResumeAnalysis.analyzed_at.desc())
+    )).scalars().all()
     
     return {
         "resume_id": resume_id,
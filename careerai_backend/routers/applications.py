@@ -1,14 +1,18 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, Insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
+import logging
 
-from database import get_db
+from database import get_async_db, DIALECT_INSERTS
+from rollups import increment
 from models import (
     JobApplication, Job, User, Resume,
     ApplicationStatus, UserRole
 )
-from routers.users import get_current_user
+from routers.users import get_current_principal, Principal
+from matching import score_candidates
 from schemas import (
     JobApplicationCreate, JobApplicationResponse,
     ApplicantResponse, JobApplicationListResponse,
@@ -17,11 +21,75 @@ from schemas import (
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
+def insert_application(db: AsyncSession, values: dict) -> Insert:
+    """
+    INSERT ... ON CONFLICT (job_id, user_id) DO NOTHING RETURNING the new
+    JobApplication, so checking for an earlier application and creating
+    this one is a single statement
+    """
+    insert = DIALECT_INSERTS[db.bind.dialect.name]
+    return (
+        insert(JobApplication)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["job_id", "user_id"])
+        .returning(JobApplication)
+    )
+
+async def adjust_applicant_count(db: AsyncSession, job_id: str, delta: int):
+    """
+    Add delta to Job.applicant_count in one UPDATE (no read-modify-write,
+    never below zero); drift is corrected by maintenance.reconcile_applicant_counts
+    """
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.applicant_count + delta >= 0)
+        # A counter change is not an edit of the posting
+        .values(applicant_count=Job.applicant_count + delta, updated_at=Job.updated_at)
+    )
+
+async def score_job_applications(db: AsyncSession, job: Job, rescore: bool = False) -> int:
+    """
+    Fill in JobApplication.match_score for a job's applications in one
+    vectorized pass and one bulk UPDATE (caller commits)
+    
+    Only unscored applications are touched unless rescore is set (use it
+    after the job's requirements change). Candidates are scored on the
+    skills extracted from the resume they applied with, falling back to
+    their profile skills. Returns the number of applications scored.
+    """
+    query = (
+        select(JobApplication.id, Resume.extracted_skills, User.skills)
+        .join(User, User.id == JobApplication.user_id)
+        .outerjoin(Resume, Resume.id == JobApplication.resume_id)
+        .where(JobApplication.job_id == job.id)
+    )
+    if not rescore:
+        query = query.where(JobApplication.match_score.is_(None))
+    
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return 0
+    
+    scores = score_candidates(
+        job.requirements or [],
+        [resume_skills or profile_skills or [] for _, resume_skills, profile_skills in rows]
+    )
+    await db.execute(
+        update(JobApplication),
+        [
+            {"id": application_id, "match_score": float(score)}
+            for (application_id, _, _), score in zip(rows, scores)
+        ]
+    )
+    return len(rows)
+
 @router.post("", response_model=JobApplicationResponse)
 async def apply_for_job(
     application: JobApplicationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Apply for a job
@@ -38,42 +106,29 @@ async def apply_for_job(
         )
     
     # Check if job exists
-    job = db.query(Job).filter(Job.id == application.job_id).first()
-    if not job:
+    is_active = await db.scalar(select(Job.is_active).where(Job.id == application.job_id))
+    if is_active is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
-    if not job.is_active:
+    if not is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This job is no longer accepting applications"
         )
     
-    # Check if already applied
-    existing_app = db.query(JobApplication).filter(
-        JobApplication.job_id == application.job_id,
-        JobApplication.user_id == current_user.id
-    ).first()
-    
-    if existing_app:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Already applied to this job"
-        )
-    
     # Get resume
     resume_id = application.resume_id
     if not resume_id:
         # Use primary resume
-        primary_resume = db.query(Resume).filter(
-            Resume.user_id == current_user.id,
-            Resume.is_primary == True
-        ).first()
-        
-        if primary_resume:
-            resume_id = primary_resume.id
+        resume_id = await db.scalar(
+            select(Resume.id).where(
+                Resume.user_id == current_user.id,
+                Resume.is_primary == True
+            )
+        )
     
     # Parse AI analysis if present
     ai_data = None
@@ -84,33 +139,41 @@ async def apply_for_job(
         except:
             pass
 
-    # Create application
-    new_application = JobApplication(
-        job_id=application.job_id,
-        user_id=current_user.id,
-        resume_id=resume_id,
-        status=ApplicationStatus.PENDING,
-        applied_date=datetime.utcnow(),
-        cover_letter=application.cover_letter,
-        ai_analysis=ai_data
-    )
-    
-    db.add(new_application)
+    # Create application; the unique (job_id, user_id) index turns a repeat
+    # (or a concurrent duplicate) into no row instead of a second application
+    new_application = (await db.execute(
+        insert_application(db, {
+            "job_id": application.job_id,
+            "user_id": current_user.id,
+            "resume_id": resume_id,
+            "status": ApplicationStatus.PENDING,
+            "applied_date": datetime.utcnow(),
+            "cover_letter": application.cover_letter,
+            "ai_analysis": ai_data,
+        })
+    )).scalars().first()
+    
+    if new_application is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already applied to this job"
+        )
     
-    # Update job applicant count
-    job.applicant_count += 1
-    db.add(job)
+    # Update job applicant count and the daily rollup
+    await adjust_applicant_count(db, application.job_id, 1)
+    await db.execute(increment(
+        db.bind.dialect.name, "applications", new_application.status, new_application.applied_date
+    ))
     
-    db.commit()
-    db.refresh(new_application)
+    await db.commit()
     
     return new_application
 
 @router.get("", response_model=list[JobApplicationResponse])
 async def get_my_applications(
     status: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all applications for current user
@@ -125,47 +188,59 @@ async def get_my_applications(
             detail="Only students can view their applications"
         )
     
-    query = db.query(JobApplication).filter(
-        JobApplication.user_id == current_user.id
+    # Applications with their job details in one joined query
+    query = (
+        select(
+            JobApplication.id,
+            JobApplication.job_id,
+            JobApplication.user_id,
+            JobApplication.status,
+            JobApplication.applied_date,
+            JobApplication.match_score,
+            JobApplication.resume_id,
+            JobApplication.cover_letter,
+            Job.id.label("found_job_id"),
+            Job.title.label("job_title"),
+            Job.company_name,
+            Job.logo_url,
+        )
+        .outerjoin(Job, Job.id == JobApplication.job_id)
+        .where(JobApplication.user_id == current_user.id)
     )
     
     if status:
-        query = query.filter(JobApplication.status == status)
-    
-    applications = query.order_by(JobApplication.applied_date.desc()).all()
-    
-    # Manually populate job details
-    result = []
-    for app in applications:
-        job = db.query(Job).filter(Job.id == app.job_id).first()
-        res = JobApplicationResponse(
-            id=app.id,
-            job_id=app.job_id,
-            user_id=app.user_id,
-            status=app.status,
-            applied_date=app.applied_date,
-            match_score=app.match_score,
-            resume_id=app.resume_id,
-            cover_letter=app.cover_letter,
-            job_title=job.title if job else "Unknown Job",
-            company_name=job.company_name if job else "Unknown Company",
-            logo_url=job.logo_url if job else None
+        query = query.where(JobApplication.status == status)
+    
+    rows = (await db.execute(
+        query.order_by(JobApplication.applied_date.desc())
+    )).all()
+    
+    return [
+        JobApplicationResponse(
+            id=row.id,
+            job_id=row.job_id,
+            user_id=row.user_id,
+            status=row.status,
+            applied_date=row.applied_date,
+            match_score=row.match_score,
+            resume_id=row.resume_id,
+            cover_letter=row.cover_letter,
+            job_title=row.job_title if row.found_job_id else "Unknown Job",
+            company_name=row.company_name if row.found_job_id else "Unknown Company",
+            logo_url=row.logo_url
         )
-        result.append(res)
-        
-    return result
+        for row in rows
+    ]
 
 @router.get("/{application_id}", response_model=JobApplicationResponse)
 async def get_application(
     application_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific application"""
     
-    application = db.query(JobApplication).filter(
-        JobApplication.id == application_id
-    ).first()
+    application = await db.get(JobApplication, application_id)
     
     if not application:
         raise HTTPException(
@@ -174,7 +249,7 @@ async def get_application(
         )
     
     # Check access: student can view own application, employer can view applications to their jobs
-    job = db.query(Job).filter(Job.id == application.job_id).first()
+    job = await db.get(Job, application.job_id)
     
     if (application.user_id != current_user.id and 
         (current_user.role != UserRole.EMPLOYER or job.posted_by != current_user.id)):
@@ -189,14 +264,20 @@ async def get_application(
 async def get_job_applicants(
     job_id: str,
     status: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    sort: str = Query("recent", pattern="^(recent|match)$"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all applicants for a specific job (employer only)
     
     **Query parameters:**
     - status: Filter by application status
+    - sort: recent (default, newest first) or match (best match score first)
+    - skip: Number of applicants to skip (default: 0)
+    - limit: Number of applicants to return (default: all)
     """
     
     if current_user.role != UserRole.EMPLOYER:
@@ -205,7 +286,7 @@ async def get_job_applicants(
             detail="Only employers can view applicants"
         )
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -220,54 +301,73 @@ async def get_job_applicants(
         )
     
     try:
-        query = db.query(JobApplication).filter(
-            JobApplication.job_id == job_id
+        # Score anyone who applied since the last view
+        if await score_job_applications(db, job):
+            await db.commit()
+        
+        # Applications with their applicant in one joined query
+        query = (
+            select(
+                JobApplication.id,
+                JobApplication.applied_date,
+                JobApplication.status,
+                JobApplication.match_score,
+                User.first_name,
+                User.last_name,
+                User.email,
+                User.avatar_url,
+            )
+            .join(User, User.id == JobApplication.user_id)
+            .where(JobApplication.job_id == job_id)
         )
         
         if status:
-            query = query.filter(JobApplication.status == status)
+            query = query.where(JobApplication.status == status)
+        
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
         
-        applications = query.order_by(JobApplication.applied_date.desc()).all()
-        print(f"DEBUG: Found {len(applications)} applications for job {job_id}")
+        if sort == "match":
+            query = query.order_by(
+                JobApplication.match_score.desc().nulls_last(),
+                JobApplication.applied_date.desc(),
+                JobApplication.id.desc()
+            )
+        else:
+            query = query.order_by(JobApplication.applied_date.desc(), JobApplication.id.desc())
         
-        # Build applicant responses
-        applicants = []
-        for app in applications:
-            print(f"DEBUG: Processing app {app.id}, user {app.user_id}, status {app.status}")
-            user = db.query(User).filter(User.id == app.user_id).first()
-            if user:
-                print(f"DEBUG: User found: {user.first_name} {user.last_name}")
-                applicants.append(ApplicantResponse(
-                    id=app.id,
-                    name=f"{user.first_name} {user.last_name}",
-                    email=user.email,
-                    avatar_url=user.avatar_url,
-                    applied_date=app.applied_date,
-                    status=app.status,
-                    match_score=app.match_score
-                ))
-            else:
-                print(f"DEBUG: User {app.user_id} not found!")
+        query = query.offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        
+        applicants = [
+            ApplicantResponse(
+                id=row.id,
+                name=f"{row.first_name} {row.last_name}",
+                email=row.email,
+                avatar_url=row.avatar_url,
+                applied_date=row.applied_date,
+                status=row.status,
+                match_score=row.match_score
+            )
+            for row in (await db.execute(query)).all()
+        ]
         
-        print("DEBUG: Returning response")
         return JobApplicationListResponse(
             job_id=job_id,
             job_title=job.title,
-            total_applicants=len(applicants),
+            total_applicants=total,
             applicants=applicants
         )
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"ERROR in get_job_applicants: {e}")
+        logger.exception("Error listing applicants for job %s", job_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/{application_id}/status")
 async def update_application_status(
     application_id: str,
     request: UpdateApplicationStatusRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update application status (employer only)
@@ -283,9 +383,7 @@ async def update_application_status(
             detail="Only employers can update application status"
         )
     
-    application = db.query(JobApplication).filter(
-        JobApplication.id == application_id
-    ).first()
+    application = await db.get(JobApplication, application_id)
     
     if not application:
         raise HTTPException(
@@ -293,7 +391,7 @@ async def update_application_status(
             detail="Application not found"
         )
     
-    job = db.query(Job).filter(Job.id == application.job_id).first()
+    job = await db.get(Job, application.job_id)
     
     if job.posted_by != current_user.id:
         raise HTTPException(
@@ -307,8 +405,8 @@ async def update_application_status(
         application.employer_notes = request.notes
     
     db.add(application)
-    db.commit()
-    db.refresh(application)
+    await db.commit()
+    await db.refresh(application)
     
     return {
         "message": "Application status updated successfully",
@@ -318,14 +416,12 @@ async def update_application_status(
 @router.delete("/{application_id}")
 async def withdraw_application(
     application_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Withdraw a job application (student only - own applications)"""
     
-    application = db.query(JobApplication).filter(
-        JobApplication.id == application_id
-    ).first()
+    application = await db.get(JobApplication, application_id)
     
     if not application:
         raise HTTPException(
@@ -339,13 +435,11 @@ async def withdraw_application(
             detail="Can only withdraw your own applications"
         )
     
+    await db.delete(application)
+    
     # Update job applicant count
-    job = db.query(Job).filter(Job.id == application.job_id).first()
-    if job and job.applicant_count > 0:
-        job.applicant_count -= 1
-        db.add(job)
+    await adjust_applicant_count(db, application.job_id, -1)
     
-    db.delete(application)
-    db.commit()
+    await db.commit()
     
     return {"message": "Application withdrawn successfully"}
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 import uuid
 from typing import Optional
 
-from database import get_db
+from database import get_async_db
 from models import User, UserRole, UserStatus
-from core_auth import AuthService
+from core_auth import AuthService, PasswordHasherBusy
 from schemas import (
     SignupRequest, LoginRequest, TokenResponse,
     RefreshTokenRequest, UserResponse
@@ -15,8 +15,15 @@ from schemas import (
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/signup", response_model=TokenResponse)
-async def signup(request: SignupRequest, db: Session = Depends(get_db)):
+async def signup(request: SignupRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user
     
@@ -31,9 +38,10 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     """
     
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        or_(User.email == request.email)
-    ).first()
+    result = await db.execute(
+        select(User).where(or_(User.email == request.email))
+    )
+    existing_user = result.scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -42,7 +50,10 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = AuthService.hash_password(request.password)
+    try:
+        hashed_password = await AuthService.hash_password_async(request.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     
     new_user = User(
         id=str(uuid.uuid4()),
@@ -57,8 +68,8 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create tokens
     access_token = AuthService.create_access_token({"sub": new_user.id})
@@ -71,7 +82,7 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Login user and return access and refresh tokens
     
@@ -80,7 +91,8 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     - password: User password
     """
     
-    user = db.query(User).filter(User.email == request.email).first()
+    result = await db.execute(select(User).where(User.email == request.email))
+    user = result.scalars().first()
     
     if not user:
         raise HTTPException(
@@ -88,12 +100,25 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
             detail="Invalid email or password"
         )
     
-    if not AuthService.verify_password(request.password, user.hashed_password):
+    try:
+        password_valid, new_hash = await AuthService.verify_and_update_async(
+            request.password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Transparently upgrade hashes made with a different bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        await db.commit()
+    
     if user.status == UserStatus.SUSPENDED:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -111,7 +136,7 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     )
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(request: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Refresh access token using refresh token
     
@@ -135,7 +160,7 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
             detail="Invalid token payload"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -3,15 +3,17 @@ Interview results API router
 Handles storing and retrieving AI interview evaluation results
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 from datetime import datetime
 import uuid
 from typing import List, Optional
 
-from database import get_db
-from models import InterviewResult, JobApplication, User, Job, UserRole
-from routers.users import get_current_user
+from database import get_async_db
+from models import InterviewResult, JobApplication, Job, UserRole
+from routers.users import get_current_principal, Principal
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/interviews", tags=["interviews"])
@@ -64,13 +66,43 @@ class InterviewResultResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# ============= Listing helpers =============
+
+# Full question/answer transcripts are only needed for a single result
+LISTING_OPTIONS = (
+    defer(InterviewResult.questions),
+    defer(InterviewResult.answers),
+    defer(InterviewResult.question_wise_analysis),
+    defer(InterviewResult.question_scores),
+)
+
+SORT_COLUMNS = {
+    "interview_date": InterviewResult.interview_date,
+    "overall_score": InterviewResult.overall_score,
+}
+
+async def list_interviews(
+    db: AsyncSession,
+    query: Select,
+    sort: str,
+    skip: int,
+    limit: Optional[int]
+) -> List[InterviewResult]:
+    """One page of interview results (best/newest first) without the transcripts"""
+    query = query.options(*LISTING_OPTIONS).order_by(
+        SORT_COLUMNS[sort].desc(), InterviewResult.id.desc()
+    ).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return (await db.execute(query)).scalars().all()
+
 # ============= API Endpoints =============
 
 @router.post("/save", response_model=InterviewResultResponse)
 async def save_interview_result(
     request: SaveInterviewResultRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Save AI interview evaluation results
@@ -78,10 +110,12 @@ async def save_interview_result(
     """
     try:
         # Verify the application exists and belongs to current user
-        application = db.query(JobApplication).filter(
-            JobApplication.id == request.application_id,
-            JobApplication.user_id == current_user.id
-        ).first()
+        application = (await db.execute(
+            select(JobApplication).where(
+                JobApplication.id == request.application_id,
+                JobApplication.user_id == current_user.id
+            )
+        )).scalars().first()
         
         if not application:
             raise HTTPException(
@@ -112,15 +146,15 @@ async def save_interview_result(
         )
         
         db.add(interview_result)
-        db.commit()
-        db.refresh(interview_result)
+        await db.commit()
+        await db.refresh(interview_result)
         
         return interview_result
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save interview result: {str(e)}"
@@ -129,8 +163,8 @@ async def save_interview_result(
 @router.get("/{application_id}", response_model=InterviewResultResponse)
 async def get_interview_result(
     application_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get interview results for a specific application
@@ -138,9 +172,7 @@ async def get_interview_result(
     """
     try:
         # Get the application
-        application = db.query(JobApplication).filter(
-            JobApplication.id == application_id
-        ).first()
+        application = await db.get(JobApplication, application_id)
         
         if not application:
             raise HTTPException(
@@ -151,10 +183,12 @@ async def get_interview_result(
         # Check authorization (student or employer)
         is_applicant = application.user_id == current_user.id
         is_employer = (
-            db.query(Job).filter(
-                Job.id == application.job_id,
-                Job.posted_by == current_user.id
-            ).first() is not None
+            (await db.execute(
+                select(Job.id).where(
+                    Job.id == application.job_id,
+                    Job.posted_by == current_user.id
+                )
+            )).first() is not None
         )
         is_admin = current_user.role == UserRole.ADMIN
         
@@ -165,9 +199,11 @@ async def get_interview_result(
             )
         
         # Get interview result
-        interview_result = db.query(InterviewResult).filter(
-            InterviewResult.application_id == application_id
-        ).first()
+        interview_result = (await db.execute(
+            select(InterviewResult).where(
+                InterviewResult.application_id == application_id
+            )
+        )).scalars().first()
         
         if not interview_result:
             raise HTTPException(
@@ -188,16 +224,24 @@ async def get_interview_result(
 @router.get("/applicant/{job_id}", response_model=List[InterviewResultResponse])
 async def get_applicants_with_interviews(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    sort: str = Query("interview_date", pattern="^(interview_date|overall_score)$"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all applicants with their interview results for a job
     Only accessible to the employer who posted the job
+    
+    **Query parameters:**
+    - sort: interview_date (default, newest first) or overall_score (best first)
+    - skip: Number of results to skip (default: 0)
+    - limit: Number of results to return (default: all)
     """
     try:
         # Verify current user is the employer
-        job = db.query(Job).filter(Job.id == job_id).first()
+        job = await db.get(Job, job_id)
         
         if not job:
             raise HTTPException(
@@ -211,20 +255,14 @@ async def get_applicants_with_interviews(
                 detail="Not authorized to view applicants for this job"
             )
         
-        # Get all applications for this job with interview results
-        applications = db.query(JobApplication).filter(
-            JobApplication.job_id == job_id
-        ).all()
-        
-        interview_results = []
-        for app in applications:
-            interview = db.query(InterviewResult).filter(
-                InterviewResult.application_id == app.id
-            ).first()
-            if interview:
-                interview_results.append(interview)
-        
-        return interview_results
+        # Interview results of this job's applications in one joined query
+        return await list_interviews(
+            db,
+            select(InterviewResult)
+            .join(JobApplication, JobApplication.id == InterviewResult.application_id)
+            .where(JobApplication.job_id == job_id),
+            sort, skip, limit
+        )
         
     except HTTPException:
         raise
@@ -237,12 +275,20 @@ async def get_applicants_with_interviews(
 @router.get("/student/{student_id}/history", response_model=List[InterviewResultResponse])
 async def get_student_interview_history(
     student_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    sort: str = Query("interview_date", pattern="^(interview_date|overall_score)$"),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all interviews taken by a student
     Only accessible to the student themselves or admin
+    
+    **Query parameters:**
+    - sort: interview_date (default, newest first) or overall_score (best first)
+    - skip: Number of results to skip (default: 0)
+    - limit: Number of results to return (default: all)
     """
     try:
         # Check authorization
@@ -252,20 +298,14 @@ async def get_student_interview_history(
                 detail="Not authorized to view this student's history"
             )
         
-        # Get all applications for this student with interview results
-        applications = db.query(JobApplication).filter(
-            JobApplication.user_id == student_id
-        ).all()
-        
-        interview_results = []
-        for app in applications:
-            interview = db.query(InterviewResult).filter(
-                InterviewResult.application_id == app.id
-            ).first()
-            if interview:
-                interview_results.append(interview)
-        
-        return interview_results
+        # Interview results of this student's applications in one joined query
+        return await list_interviews(
+            db,
+            select(InterviewResult)
+            .join(JobApplication, JobApplication.id == InterviewResult.application_id)
+            .where(JobApplication.user_id == student_id),
+            sort, skip, limit
+        )
         
     except HTTPException:
         raise
@@ -278,17 +318,15 @@ async def get_student_interview_history(
 @router.delete("/{interview_id}")
 async def delete_interview_result(
     interview_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete an interview result
     Only accessible to student who took it or admin
     """
     try:
-        interview = db.query(InterviewResult).filter(
-            InterviewResult.id == interview_id
-        ).first()
+        interview = await db.get(InterviewResult, interview_id)
         
         if not interview:
             raise HTTPException(
@@ -297,9 +335,7 @@ async def delete_interview_result(
             )
         
         # Check authorization
-        application = db.query(JobApplication).filter(
-            JobApplication.id == interview.application_id
-        ).first()
+        application = await db.get(JobApplication, interview.application_id)
         
         if application.user_id != current_user.id and current_user.role != UserRole.ADMIN:
             raise HTTPException(
@@ -307,15 +343,15 @@ async def delete_interview_result(
                 detail="Not authorized to delete this interview"
             )
         
-        db.delete(interview)
-        db.commit()
+        await db.delete(interview)
+        await db.commit()
         
         return {"message": "Interview result deleted successfully"}
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete interview result: {str(e)}"
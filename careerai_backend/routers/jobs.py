@@ -1,24 +1,75 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from sqlalchemy import Select, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from typing import Optional, List
 from datetime import datetime
 
-from database import get_db
-from models import Job, User, UserRole, JobApplication, ApplicationStatus
+from database import get_async_db, AsyncSessionLocal
+from models import Job, UserRole, JobApplication, ApplicationStatus, job_skills
 from core_auth import AuthService
 from schemas import (
-    JobCreate, JobUpdate, JobResponse, JobListResponse
+    JobCreate, JobUpdate, JobResponse, JobCardResponse, JobListResponse
 )
-from routers.users import get_current_user
+from routers.users import get_current_principal, Principal
+from search import get_job_search
+from pagination import apply_keyset, split_page
+from catalog import bump_catalog_version, catalog_version
+from cache import TTLCache
+from singleflight import SingleFlight, flight_key
+from config import settings
+from http_cache import CachedResponse, make_etag, is_not_modified, not_modified
+from routers.applications import score_job_applications
+from taxonomy import get_taxonomy
+from matching import skill_key
 
 router = APIRouter()
 
+# Serialized job list pages for anonymous visitors, per (query string,
+# catalog version): creating, editing, closing or deleting a job moves the
+# version and so retires every page at once
+_job_list_responses = TTLCache(settings.job_list_cache_size, settings.job_list_cache_ttl_seconds)
+
+# Concurrent identical reads of a job or a list page (a shared link going
+# around) share one load; public reads, so the key has no auth scope
+_job_reads = SingleFlight("jobs")
+
+def job_list_cache_control(anonymous: bool) -> str:
+    if anonymous:
+        return f"public, max-age={settings.job_list_cache_ttl_seconds}"
+    return "private, no-cache"
+
+# What view=card loads: everything a job card shows, without the TEXT columns
+JOB_CARD_COLUMNS = (
+    Job.id, Job.title, Job.description_excerpt, Job.location, Job.job_type,
+    Job.salary_range, Job.company_name, Job.logo_url, Job.cover_url,
+    Job.requirements, Job.applicant_count, Job.posted_date, Job.is_active,
+    Job.posted_by,
+)
+
+def select_jobs(view: str) -> Select:
+    """select(Job), loading only the card columns for view=card"""
+    query = select(Job)
+    if view == "card":
+        query = query.options(load_only(*JOB_CARD_COLUMNS, raiseload=True))
+    return query
+
+def job_schema(view: str):
+    return JobCardResponse if view == "card" else JobResponse
+
+def jobs_with_skills(skills: List[str], match: str = "any") -> Select:
+    """Ids of jobs requiring any (or all) of skills, from the indexed job_skills table"""
+    keys = list(dict.fromkeys(key for key in map(skill_key, skills) if key))
+    query = select(job_skills.c.job_id).where(job_skills.c.skill.in_(keys))
+    if match == "all":
+        query = query.group_by(job_skills.c.job_id).having(func.count() == len(keys))
+    return query
+
 @router.post("", response_model=JobResponse)
 async def create_job(
     job: JobCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new job posting (employer only)
@@ -53,83 +104,222 @@ async def create_job(
         company_description=job.company_description,
         logo_url=job.logo_url,
         cover_url=job.cover_url,
-        requirements=job.requirements or [],
+        requirements=get_taxonomy().canonicalize_list(job.requirements),
         posted_by=current_user.id,
         posted_date=datetime.utcnow(),
         is_active=True
     )
     
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
+    await db.commit()
+    bump_catalog_version()
+    await db.refresh(new_job)
     
     return new_job
 
+def job_validators(job_id: str, updated_at: Optional[datetime], applicant_count: int) -> dict:
+    """
+    ETag of a job. No Last-Modified: applicant_count is bumped without
+    touching updated_at, so only a tag covering both can tell a client
+    its copy is current.
+    """
+    return {
+        "ETag": make_etag("job", job_id, updated_at, applicant_count),
+        "Cache-Control": "no-cache"
+    }
+
+async def load_job_validators(job_id: str):
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(Job.updated_at, Job.applicant_count).where(Job.id == job_id)
+        )).first()
+
+async def load_job(job_id: str):
+    """(JobResponse, validator headers) of a job, or None"""
+    async with AsyncSessionLocal() as db:
+        job = await db.get(Job, job_id)
+        if job is None:
+            return None
+        return JobResponse.model_validate(job), job_validators(job.id, job.updated_at, job.applicant_count)
+
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(
     job_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response
 ):
-    """Get a specific job by ID"""
+    """
+    Get a specific job by ID
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    Sends an ETag; conditional requests (If-None-Match) for an unchanged
+    job get 304 Not Modified.
+    Concurrent requests for the same job share one database read.
+    """
     
-    if not job:
+    version = catalog_version()
+    if "if-none-match" in request.headers:
+        # Check the validators before loading and serializing the whole row
+        current = await _job_reads.do(
+            flight_key("jobs.validators", {"job_id": job_id, "catalog": version}),
+            lambda: load_job_validators(job_id)
+        )
+        if current is not None:
+            headers = job_validators(job_id, current.updated_at, current.applicant_count)
+            if is_not_modified(request, headers["ETag"]):
+                return not_modified(headers)
+    
+    loaded = await _job_reads.do(
+        flight_key("jobs.get", {"job_id": job_id, "catalog": version}),
+        lambda: load_job(job_id)
+    )
+    
+    if not loaded:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
+    job, headers = loaded
+    response.headers.update(headers)
     return job
 
+async def build_job_list_page(
+    location: Optional[str],
+    job_type: Optional[str],
+    keyword: Optional[str],
+    skills: Optional[str],
+    skills_match: str,
+    sort: str,
+    is_active: bool,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    include_total: bool,
+    view: str
+) -> CachedResponse:
+    """Serialized job list page, read in its own session (shared by concurrent callers)"""
+    async with AsyncSessionLocal() as db:
+        query = select_jobs(view).where(Job.is_active == is_active)
+        schema = job_schema(view)
+        rank = snippet = None
+        
+        if location:
+            query = query.where(Job.location.ilike(f"%{location}%"))
+        
+        if job_type:
+            query = query.where(Job.job_type == job_type)
+        
+        if skills:
+            query = query.where(Job.id.in_(jobs_with_skills(skills.split(","), skills_match)))
+        
+        if keyword:
+            query, rank, snippet = get_job_search().match(query, keyword)
+        
+        total = None
+        if include_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+        
+        if rank is not None:
+            query = query.add_columns(rank.label("relevance"), snippet.label("snippet"))
+        
+        next_cursor = None
+        if rank is not None and sort == "relevance":
+            query = query.order_by(rank.desc(), Job.posted_date.desc(), Job.id.desc())
+            rows = (await db.execute(query.offset(skip).limit(limit))).all()
+        else:
+            query = apply_keyset(query, Job.posted_date, Job.id, cursor)
+            if not cursor:
+                query = query.offset(skip)
+            rows = (await db.execute(query.limit(limit + 1))).all()
+            rows, next_cursor = split_page(
+                rows, limit, lambda row: (row[0].posted_date, row[0].id)
+            )
+        
+        if rank is not None:
+            jobs = [
+                schema.model_validate(job).model_copy(
+                    update={"relevance": relevance, "snippet": snippet_text}
+                )
+                for job, relevance, snippet_text in rows
+            ]
+        else:
+            jobs = [schema.model_validate(row[0]) for row in rows]
+        
+        return CachedResponse.from_json(JobListResponse(
+            total=total,
+            page=(skip // limit) + 1,
+            page_size=limit,
+            jobs=jobs,
+            next_cursor=next_cursor
+        ).model_dump_json().encode("utf-8"))
+
 @router.get("", response_model=JobListResponse)
 async def list_jobs(
+    request: Request,
     location: Optional[str] = Query(None),
     job_type: Optional[str] = Query(None),
     keyword: Optional[str] = Query(None),
+    skills: Optional[str] = Query(None),
+    skills_match: str = Query("any", pattern="^(any|all)$"),
+    sort: str = Query("recent", pattern="^(recent|relevance)$"),
     is_active: bool = True,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    include_total: bool = True,
+    view: str = Query("full", pattern="^(card|full)$")
 ):
     """
     List all jobs with optional filtering
     
+    Responses carry an ETag (If-None-Match gets 304 Not Modified). Pages
+    requested without credentials are cached in the worker and marked
+    cacheable by shared caches for JOB_LIST_CACHE_TTL_SECONDS. Concurrent
+    identical requests share one set of queries.
+    
     **Query parameters:**
     - location: Filter by location
     - job_type: Filter by job type
-    - keyword: Search in title and description
+    - keyword: Full-text search in title and description
+    - skills: Comma-separated skills the job requires (e.g. Python,Docker)
+    - skills_match: any (default, at least one skill) or all (every skill)
+    - sort: recent (default) or relevance (keyword searches only)
     - is_active: Filter by active status (default: true)
-    - skip: Number of records to skip (default: 0)
+    - skip: Number of records to skip (default: 0, offset mode)
     - limit: Number of records to return (default: 20, max: 100)
+    - cursor: next_cursor from the previous page (keyset mode, ignores skip)
+    - include_total: Count all matching jobs (default: true)
+    - view: full (default, JobResponse) or card (JobCardResponse: a
+      description_excerpt instead of description and company_description,
+      which are not read from the database)
     """
     
+    if cursor and sort == "relevance":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor pagination is only available for sort=recent"
+        )
+    
+    anonymous = "authorization" not in request.headers
+    cache_key = (tuple(sorted(request.query_params.multi_items())), catalog_version())
+    if anonymous:
+        cached = _job_list_responses.get(cache_key)
+        if cached is not None:
+            return cached.respond(request, job_list_cache_control(anonymous))
+    
+    params = {
+        "location": location, "job_type": job_type, "keyword": keyword,
+        "skills": skills, "skills_match": skills_match, "sort": sort,
+        "is_active": is_active, "skip": skip, "limit": limit,
+        "cursor": cursor, "include_total": include_total, "view": view,
+    }
     try:
-        query = db.query(Job).filter(Job.is_active == is_active)
-        
-        if location:
-            query = query.filter(Job.location.ilike(f"%{location}%"))
-        
-        if job_type:
-            query = query.filter(Job.job_type == job_type)
-        
-        if keyword:
-            query = query.filter(
-                or_(
-                    Job.title.ilike(f"%{keyword}%"),
-                    Job.description.ilike(f"%{keyword}%")
-                )
-            )
-        
-        total = query.count()
-        jobs = query.order_by(Job.posted_date.desc()).offset(skip).limit(limit).all()
-        
-        return JobListResponse(
-            total=total,
-            page=(skip // limit) + 1,
-            page_size=limit,
-            jobs=jobs
+        page = await _job_reads.do(
+            flight_key("jobs.list", {**params, "catalog": cache_key[1]}),
+            lambda: build_job_list_page(**params)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         # Return empty list if DB is unavailable
         import logging
@@ -141,15 +331,30 @@ async def list_jobs(
             page_size=limit,
             jobs=[]
         )
+    
+    if anonymous:
+        _job_list_responses.set(cache_key, page)
+    return page.respond(request, job_list_cache_control(anonymous))
 
 @router.get("/employer/my-jobs")
 async def get_employer_jobs(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    include_total: bool = True,
+    view: str = Query("full", pattern="^(card|full)$"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all jobs posted by current employer"""
+    """
+    Get all jobs posted by current employer
+    
+    **Query parameters:**
+    - skip / limit: Offset pagination
+    - cursor: next_cursor from the previous page (keyset mode, ignores skip)
+    - include_total: Count all of the employer's jobs (default: true)
+    - view: full (default) or card (no description or company_description)
+    """
     
     if current_user.role != UserRole.EMPLOYER:
         raise HTTPException(
@@ -157,28 +362,42 @@ async def get_employer_jobs(
             detail="Only employers can access their jobs"
         )
     
-    total = db.query(Job).filter(Job.posted_by == current_user.id).count()
-    jobs = db.query(Job).filter(
-        Job.posted_by == current_user.id
-    ).order_by(Job.posted_date.desc()).offset(skip).limit(limit).all()
+    total = None
+    if include_total:
+        total = await db.scalar(
+            select(func.count()).select_from(Job).where(Job.posted_by == current_user.id)
+        )
+    
+    query = apply_keyset(
+        select_jobs(view).where(Job.posted_by == current_user.id),
+        Job.posted_date, Job.id, cursor
+    )
+    if not cursor:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit + 1))
+    jobs, next_cursor = split_page(
+        result.scalars().all(), limit, lambda job: (job.posted_date, job.id)
+    )
+    schema = job_schema(view)
     
     return JobListResponse(
         total=total,
         page=(skip // limit) + 1,
         page_size=limit,
-        jobs=jobs
+        jobs=[schema.model_validate(job) for job in jobs],
+        next_cursor=next_cursor
     )
 
 @router.put("/{job_id}", response_model=JobResponse)
 async def update_job(
     job_id: str,
     update: JobUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a job posting (employer only - own jobs)"""
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -194,25 +413,31 @@ async def update_job(
         )
     
     update_data = update.dict(exclude_unset=True)
+    if "requirements" in update_data:
+        update_data["requirements"] = get_taxonomy().canonicalize_list(update_data["requirements"])
     
     for field, value in update_data.items():
         setattr(job, field, value)
     
     db.add(job)
-    db.commit()
-    db.refresh(job)
+    if "requirements" in update_data:
+        await db.flush()
+        await score_job_applications(db, job, rescore=True)
+    await db.commit()
+    bump_catalog_version()
+    await db.refresh(job)
     
     return job
 
 @router.delete("/{job_id}")
 async def delete_job(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a job posting (employer only - own jobs)"""
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -227,20 +452,21 @@ async def delete_job(
             detail="Can only delete your own jobs"
         )
     
-    db.delete(job)
-    db.commit()
+    await db.delete(job)
+    await db.commit()
+    bump_catalog_version()
     
     return {"message": "Job deleted successfully"}
 
 @router.post("/{job_id}/close")
 async def close_job(
     job_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Close a job posting (stop accepting applications)"""
     
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -256,7 +482,8 @@ async def close_job(
     
     job.is_active = False
     db.add(job)
-    db.commit()
-    db.refresh(job)
+    await db.commit()
+    bump_catalog_version()
+    await db.refresh(job)
     
     return {"message": "Job closed successfully", "job": job}
@@ -1,28 +1,79 @@
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Query
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
 from datetime import datetime
+import asyncio
+import hashlib
+import json
 import os
-import shutil
+import uuid
 from pathlib import Path
 
-from database import get_db
-from models import Resume, User, ResumeAnalysis
-from routers.users import get_current_user
+import aiofiles
+import aiofiles.os
+
+from config import settings
+from database import get_async_db, AsyncSessionLocal
+from models import Resume, ResumeAnalysis, ExtractionStatus
+from routers.users import get_current_principal, Principal
+from blobs import BLOB_DIR, blob_path, acquire_blob
+from extraction import EXTRACTED_FIELDS, schedule_extraction, wait_for_change
+from schemas import ExtractionStatusResponse
 
 router = APIRouter()
 
 # Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads/resumes")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+BLOB_DIR.mkdir(parents=True, exist_ok=True)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Extraction status stream: re-read interval (updates from this process wake
+# it immediately) and how long one connection is kept open
+EXTRACTION_EVENTS_POLL_SECONDS = 2.0
+EXTRACTION_EVENTS_MAX_SECONDS = 300
+EXTRACTION_DONE = {ExtractionStatus.COMPLETED.value, ExtractionStatus.FAILED.value}
+
+async def save_upload(file: UploadFile, max_bytes: int) -> Tuple[Path, int, str]:
+    """
+    Stream an upload to a temp file in the blob store in chunks, hashing and
+    counting bytes on the way; returns (temp path, size, SHA-256 hex digest)
+    and the caller moves the temp file into place. A failed or oversized
+    upload (413) never leaves a partial file behind.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    await aiofiles.os.makedirs(BLOB_DIR, exist_ok=True)
+    temp_path = BLOB_DIR / f".{uuid.uuid4().hex}.part"
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Resume files are limited to {max_bytes // (1024 * 1024)} MB"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        await discard(temp_path)
+        raise
+    return temp_path, size, digest.hexdigest()
+
+async def discard(path: Path):
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
 
 @router.post("/upload")
 async def upload_resume(
     file: UploadFile = File(...),
     is_primary: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload a resume file
@@ -31,7 +82,11 @@ async def upload_resume(
     - file: PDF or DOCX resume file
     - is_primary: Set as primary resume (default: false)
     
-    **Supported formats:** PDF, DOCX, DOC
+    **Supported formats:** PDF, DOCX
+    
+    Text, skills, experience, education and contact details are extracted
+    in the background; follow extraction_status with
+    GET /{resume_id}/extraction or GET /{resume_id}/extraction/events.
     """
     
     if current_user.role.value != "STUDENT":
@@ -48,13 +103,27 @@ async def upload_resume(
             detail="Only PDF and DOCX files are allowed"
         )
     
-    # Save file
-    file_path = UPLOAD_DIR / f"{current_user.id}_{file.filename}"
+    # Receive the file
+    try:
+        temp_path, file_size, content_hash = await save_upload(file, settings.max_resume_upload_bytes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload file: {str(e)}"
+        )
     
+    # Reference the blob for this content (locking its row), then put the
+    # file in place; identical content already stored is simply overwritten
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await db.execute(acquire_blob(db.bind.dialect.name, content_hash, file_size))
+        file_path = blob_path(content_hash)
+        await aiofiles.os.makedirs(file_path.parent, exist_ok=True)
+        await aiofiles.os.replace(temp_path, file_path)
     except Exception as e:
+        await db.rollback()
+        await discard(temp_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload file: {str(e)}"
@@ -63,42 +132,68 @@ async def upload_resume(
     # Create resume record
     resume = Resume(
         user_id=current_user.id,
-        file_name=file.filename,
+        file_name=os.path.basename(file.filename or "resume"),
         file_path=str(file_path),
-        file_size=os.path.getsize(file_path),
+        file_size=file_size,
+        content_hash=content_hash,
         file_type=file.content_type,
         is_primary=is_primary,
         uploaded_at=datetime.utcnow()
     )
     
+    # Same content uploaded before: reuse what was extracted from it,
+    # otherwise queue extraction once the row is committed
+    earlier = (await db.execute(
+        select(Resume).where(
+            Resume.content_hash == content_hash,
+            Resume.extracted_text.isnot(None)
+        ).limit(1)
+    )).scalars().first()
+    if earlier:
+        for field in EXTRACTED_FIELDS:
+            setattr(resume, field, getattr(earlier, field))
+        resume.extraction_status = ExtractionStatus.COMPLETED.value
+    else:
+        resume.extraction_status = ExtractionStatus.PENDING.value
+    
     # If this is primary, unset previous primary
     if is_primary:
-        db.query(Resume).filter(
-            Resume.user_id == current_user.id,
-            Resume.is_primary == True
-        ).update({Resume.is_primary: False})
+        await db.execute(
+            update(Resume).where(
+                Resume.user_id == current_user.id,
+                Resume.is_primary == True
+            ).values(is_primary=False)
+        )
     
     db.add(resume)
-    db.commit()
-    db.refresh(resume)
+    await db.commit()
+    await db.refresh(resume)
+    
+    if resume.extraction_status == ExtractionStatus.PENDING.value:
+        schedule_extraction(resume.id)
     
     return {
         "message": "Resume uploaded successfully",
         "resume_id": resume.id,
         "file_name": resume.file_name,
-        "is_primary": resume.is_primary
+        "file_size": resume.file_size,
+        "content_hash": resume.content_hash,
+        "is_primary": resume.is_primary,
+        "extraction_status": resume.extraction_status
     }
 
 @router.get("")
 async def list_resumes(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all resumes for current user"""
     
-    resumes = db.query(Resume).filter(
-        Resume.user_id == current_user.id
-    ).order_by(Resume.uploaded_at.desc()).all()
+    resumes = (await db.execute(
+        select(Resume).where(
+            Resume.user_id == current_user.id
+        ).order_by(Resume.uploaded_at.desc())
+    )).scalars().all()
     
     return {
         "resumes": resumes,
@@ -108,12 +203,12 @@ async def list_resumes(
 @router.get("/{resume_id}")
 async def get_resume(
     resume_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific resume"""
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -133,12 +228,12 @@ async def get_resume(
 @router.get("/{resume_id}/download")
 async def download_resume(
     resume_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Download a resume file"""
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -165,16 +260,126 @@ async def download_resume(
         media_type=resume.file_type
     )
 
+async def load_own_resume(db: AsyncSession, resume_id: str, current_user: Principal) -> Resume:
+    """The current user's resume, or 404/403"""
+    resume = await db.get(Resume, resume_id)
+    
+    if not resume:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resume not found"
+        )
+    
+    if resume.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot access this resume"
+        )
+    
+    return resume
+
+def extraction_state(resume_id: str, row) -> ExtractionStatusResponse:
+    return ExtractionStatusResponse(
+        resume_id=resume_id,
+        status=row.extraction_status if row else None,
+        error=row.extraction_error if row else None
+    )
+
+@router.get("/{resume_id}/extraction", response_model=ExtractionStatusResponse)
+async def get_extraction_status(
+    resume_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Background text extraction status of a resume: pending, processing,
+    completed or failed (with error); poll until completed or failed
+    """
+    
+    resume = await load_own_resume(db, resume_id, current_user)
+    return extraction_state(resume_id, resume)
+
+@router.get("/{resume_id}/extraction/events")
+async def stream_extraction_status(
+    resume_id: str,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Server-sent events with the extraction status of a resume
+    
+    Sends a `status` event (same body as GET /{resume_id}/extraction) now
+    and on every change, and closes after completed or failed. Comment
+    lines keep the connection alive meanwhile; clients reconnect if the
+    stream ends before a final status.
+    """
+    
+    # Short sessions only: a request-scoped one would hold its connection
+    # until the stream ends
+    async with AsyncSessionLocal() as session:
+        resume = await load_own_resume(session, resume_id, current_user)
+    initial = extraction_state(resume_id, resume)
+    
+    async def read_state() -> ExtractionStatusResponse:
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(
+                select(Resume.extraction_status, Resume.extraction_error).where(Resume.id == resume_id)
+            )).first()
+        return extraction_state(resume_id, row)
+    
+    async def events():
+        state, sent = initial, None
+        deadline = asyncio.get_running_loop().time() + EXTRACTION_EVENTS_MAX_SECONDS
+        while True:
+            if state != sent:
+                yield f"event: status\ndata: {json.dumps(state.model_dump())}\n\n"
+                sent = state
+            else:
+                yield ": waiting\n\n"
+            if state.status in EXTRACTION_DONE or state.status is None:
+                return
+            if asyncio.get_running_loop().time() >= deadline:
+                return
+            await wait_for_change(resume_id, EXTRACTION_EVENTS_POLL_SECONDS)
+            state = await read_state()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/{resume_id}/extract", response_model=ExtractionStatusResponse)
+async def retry_extraction(
+    resume_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Queue text extraction again (after a failure, or to re-read the file)"""
+    
+    resume = await load_own_resume(db, resume_id, current_user)
+    if resume.extraction_status == ExtractionStatus.PROCESSING.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Extraction is already running"
+        )
+    
+    resume.extraction_status = ExtractionStatus.PENDING.value
+    resume.extraction_error = None
+    await db.commit()
+    schedule_extraction(resume_id)
+    
+    return extraction_state(resume_id, resume)
+
 @router.put("/{resume_id}")
 async def update_resume(
     resume_id: str,
     is_primary: bool = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update resume metadata"""
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -193,27 +398,29 @@ async def update_resume(
         
         # If setting as primary, unset others
         if is_primary:
-            db.query(Resume).filter(
-                Resume.user_id == current_user.id,
-                Resume.is_primary == True,
-                Resume.id != resume_id
-            ).update({Resume.is_primary: False})
+            await db.execute(
+                update(Resume).where(
+                    Resume.user_id == current_user.id,
+                    Resume.is_primary == True,
+                    Resume.id != resume_id
+                ).values(is_primary=False)
+            )
     
     db.add(resume)
-    db.commit()
-    db.refresh(resume)
+    await db.commit()
+    await db.refresh(resume)
     
     return resume
 
 @router.delete("/{resume_id}")
 async def delete_resume(
     resume_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a resume"""
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     
     if not resume:
         raise HTTPException(
@@ -227,20 +434,13 @@ async def delete_resume(
             detail="Cannot delete this resume"
         )
     
-    # Delete file
-    try:
-        if os.path.exists(resume.file_path):
-            os.remove(resume.file_path)
-    except Exception as e:
-        # Log error but continue with database deletion
-        pass
-    
     # Delete analyses related to this resume
-    db.query(ResumeAnalysis).filter(
-        ResumeAnalysis.resume_id == resume_id
-    ).delete()
+    await db.execute(
+        delete(ResumeAnalysis).where(ResumeAnalysis.resume_id == resume_id)
+    )
     
-    db.delete(resume)
-    db.commit()
+    # The stored file goes with its last reference (see blobs.release_resume_file)
+    await db.delete(resume)
+    await db.commit()
     
     return {"message": "Resume deleted successfully"}
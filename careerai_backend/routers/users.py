@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Header
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, NamedTuple
 
-from database import get_db
-from models import User, UserRole
+from database import get_async_db
+from models import User, UserRole, UserStatus
 from core_auth import AuthService
+from catalog import bump_catalog_version
+from cache import TTLCache
+from config import settings
+from taxonomy import get_taxonomy
 from schemas import (
     StudentProfileUpdate, EmployerProfileUpdate,
     UserResponse
@@ -12,12 +17,25 @@ from schemas import (
 
 router = APIRouter()
 
-# Dependency to get current user from token
-async def get_current_user(
+class Principal(NamedTuple):
+    """The authenticated caller: all most endpoints need to authorize a request"""
+    id: str
+    role: UserRole
+    status: UserStatus
+
+# Principals by user id; every change to a user's role or status, and every
+# delete, must call invalidate_principal
+_principals = TTLCache(settings.principal_cache_size, settings.principal_cache_ttl_seconds)
+
+def invalidate_principal(user_id: str):
+    _principals.pop(user_id)
+
+# Dependency to get the current principal from token
+async def get_current_principal(
     authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """Extract and verify current user from JWT token"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Extract and verify the caller from the JWT (cached, no User row load)"""
     
     if not authorization:
         raise HTTPException(
@@ -51,9 +69,31 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    principal = _principals.get(user_id)
+    
+    if principal is None:
+        row = (await db.execute(
+            select(User.id, User.role, User.status).where(User.id == user_id)
+        )).first()
+        
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        
+        principal = Principal(*row)
+        _principals.set(user_id, principal)
+    
+    return principal
+
+async def load_user(db: AsyncSession, principal: Principal) -> User:
+    """Full User row for a principal"""
+    
+    user = await db.get(User, principal.id)
     
     if not user:
+        invalidate_principal(principal.id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -61,6 +101,14 @@ async def get_current_user(
     
     return user
 
+# Dependency to get current user from token
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Full User row of the caller, for endpoints that need more than id/role"""
+    return await load_user(db, principal)
+
 @router.get("/profile", response_model=UserResponse)
 async def get_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
@@ -70,29 +118,32 @@ async def get_profile(current_user: User = Depends(get_current_user)):
 async def update_profile(
     update: StudentProfileUpdate | EmployerProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user profile"""
     
     update_data = update.dict(exclude_unset=True)
+    if update_data.get("skills") is not None:
+        update_data["skills"] = get_taxonomy().canonicalize_list(update_data["skills"])
     
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_principal(current_user.id)
+    await db.refresh(current_user)
     
     return current_user
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user by ID (public endpoint - limited info)"""
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -107,8 +158,8 @@ async def list_users(
     role: Optional[str] = None,
     skip: int = 0,
     limit: int = 20,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all users (admin only)
@@ -126,20 +177,21 @@ async def list_users(
             detail="Only admins can list all users"
         )
     
-    query = db.query(User)
+    query = select(User)
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     
-    users = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    users = result.scalars().all()
     
     return users
 
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a user account (admin only or own account)"""
     
@@ -150,7 +202,7 @@ async def delete_user(
             detail="Cannot delete other users"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if not user:
         raise HTTPException(
@@ -158,7 +210,10 @@ async def delete_user(
             detail="User not found"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    invalidate_principal(user_id)
+    if user.role == UserRole.EMPLOYER:
+        bump_catalog_version()  # Their jobs were deleted with them
     
     return {"message": "User deleted successfully"}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, date
+from typing import Optional, List, Dict, Union
 from models import UserRole, JobType, ApplicationStatus, UserStatus
 
 # ===================== AUTH SCHEMAS =====================
@@ -122,14 +122,43 @@ class JobResponse(BaseModel):
     is_active: bool
     posted_by: str
     
+    # Populated for keyword searches only
+    relevance: Optional[float] = None
+    snippet: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+class JobCardResponse(BaseModel):
+    """A job as listed with view=card: no description or company description"""
+    id: str
+    title: str
+    description_excerpt: Optional[str]
+    location: str
+    job_type: JobType
+    salary_range: Optional[str]
+    company_name: str
+    logo_url: Optional[str]
+    cover_url: Optional[str]
+    requirements: Optional[List[str]]
+    applicant_count: int
+    posted_date: datetime
+    is_active: bool
+    posted_by: str
+    
+    # Populated for keyword searches only
+    relevance: Optional[float] = None
+    snippet: Optional[str] = None
+    
     class Config:
         from_attributes = True
 
 class JobListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     page: int
     page_size: int
-    jobs: List[JobResponse]
+    jobs: List[Union[JobResponse, JobCardResponse]]
+    next_cursor: Optional[str] = None
 
 # ===================== RESUME SCHEMAS =====================
 
@@ -144,8 +173,10 @@ class ResumeResponse(BaseModel):
     file_name: str
     file_size: int
     file_type: str
+    content_hash: Optional[str] = None
     uploaded_at: datetime
     is_primary: bool
+    extraction_status: Optional[str] = None
     extracted_skills: Optional[List[str]] = None
     extracted_experience: Optional[List[dict]] = None
     extracted_education: Optional[List[dict]] = None
@@ -157,6 +188,11 @@ class ResumeListResponse(BaseModel):
     resumes: List[ResumeResponse]
     total: int
 
+class ExtractionStatusResponse(BaseModel):
+    resume_id: str
+    status: Optional[str] = None  # pending, processing, completed, failed
+    error: Optional[str] = None
+
 # ===================== RESUME ANALYSIS SCHEMAS =====================
 
 class ResumeAnalysisResponse(BaseModel):
@@ -182,6 +218,22 @@ class JobMatchAnalysisResponse(BaseModel):
     missing_skills: List[str]
     recommendations: List[str]
 
+class RecommendedJobResponse(BaseModel):
+    job: JobResponse
+    # Same score as POST /resume/{id}/match-job/{job_id} for this resume and job
+    match_score: float
+    # IDF-weighted score the jobs are ordered by; depends on the other jobs
+    # considered (filters, catalog), so only compare it within one response
+    relevance: float
+    matched_skills: List[str]
+    missing_skills: List[str]
+    reason: str
+
+class JobRecommendationsResponse(BaseModel):
+    resume_id: str
+    jobs_considered: int
+    recommendations: List[RecommendedJobResponse]
+
 # ===================== APPLICATION SCHEMAS =====================
 
 class JobApplicationCreate(BaseModel):
@@ -241,10 +293,11 @@ class AdminApplicationItem(BaseModel):
     match_score: Optional[float] = None
 
 class AdminApplicationsListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     page: int
     page_size: int
     applications: List[AdminApplicationItem]
+    next_cursor: Optional[str] = None
 
 # ===================== CAREER RECOMMENDATION SCHEMAS =====================
 
@@ -300,6 +353,18 @@ class AnalyticsResponse(BaseModel):
     recent_job_postings: int  # Last 30 days
     avg_application_conversion_rate: float
 
+class TimeSeriesPoint(BaseModel):
+    start: date  # First day of the bucket
+    total: int
+    breakdown: Dict[str, int]  # Count per dimension (role, job type, location or status)
+
+class TimeSeriesResponse(BaseModel):
+    metric: str
+    bucket: str
+    from_date: date
+    to_date: date
+    points: List[TimeSeriesPoint]
+
 # ===================== PAGINATION SCHEMAS =====================
 
 class PaginationParams(BaseModel):
@@ -0,0 +1,51 @@
+"""
+Rebuild the job_skills table from every job's requirements
+
+Migration 0005 fills job_skills once and the Job mapper events keep it in
+step afterwards. Run this after changing the skill taxonomy (new aliases
+change the normalized keys) or after editing jobs outside the application.
+Each batch is its own transaction.
+
+Usage:
+    python scripts/backfill_job_skills.py [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+
+from database import engine
+from models import Job
+from skill_index import replace_job_skills
+from taxonomy import configure_taxonomy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Jobs rebuilt per transaction")
+    args = parser.parse_args()
+
+    configure_taxonomy(engine)
+
+    last_id = None
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            query = select(Job.id, Job.requirements).order_by(Job.id).limit(args.batch_size)
+            if last_id is not None:
+                query = query.where(Job.id > last_id)
+            rows = conn.execute(query).all()
+            if not rows:
+                break
+            replace_job_skills(conn, rows)
+        total += len(rows)
+        last_id = rows[-1][0]
+        print(f"Rebuilt skills for {total} jobs")
+
+
+if __name__ == "__main__":
+    main()
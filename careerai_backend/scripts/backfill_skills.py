@@ -0,0 +1,113 @@
+"""
+Canonicalize stored skills against the skill taxonomy
+
+Rewrites User.skills, Job.requirements and Resume.extracted_skills so every
+known spelling becomes its canonical skill ("ReactJS" -> "React"); resumes
+also pick up the taxonomy skills mentioned in their extracted text. Rows are
+read in primary-key batches and only changed rows are written back, one bulk
+UPDATE and commit per batch, so the script can be stopped and re-run safely.
+
+Jobs whose requirements change get their job_skills rows rebuilt and their
+applications' match scores cleared, so they are rescored the next time the
+employer opens the applicant list.
+
+Usage:
+    python scripts/backfill_skills.py [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, update
+
+from database import SessionLocal, engine
+from models import User, Job, Resume, JobApplication
+from taxonomy import configure_taxonomy
+from skill_index import replace_job_skills
+
+
+def batches(db, columns, batch_size):
+    """Yield lists of rows ordered by primary key, batch_size at a time"""
+    id_column = columns[0]
+    last_id = None
+    while True:
+        query = select(*columns).order_by(id_column).limit(batch_size)
+        if last_id is not None:
+            query = query.where(id_column > last_id)
+        rows = db.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def backfill(db, model, column, new_value, batch_size, dry_run, source_columns=()):
+    """Rewrite column for every row where new_value(row) differs; returns changed ids"""
+    changed_ids = []
+    scanned = 0
+    for rows in batches(db, [model.id, column, *source_columns], batch_size):
+        scanned += len(rows)
+        changes = []
+        for row in rows:
+            value = new_value(row)
+            if value != (row[1] or []):
+                changes.append({"id": row[0], column.key: value})
+        if changes and not dry_run:
+            db.execute(update(model), changes)
+            db.commit()
+        changed_ids.extend(change["id"] for change in changes)
+    print(f"{model.__tablename__}.{column.key}: {len(changed_ids)} of {scanned} rows {'would change' if dry_run else 'updated'}")
+    return changed_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows read and written per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    taxonomy = configure_taxonomy(engine)
+    print(f"Taxonomy: {len(taxonomy.skills)} skills, {len(taxonomy)} names and aliases\n")
+
+    db = SessionLocal()
+    try:
+        backfill(
+            db, User, User.skills,
+            lambda row: taxonomy.canonicalize_list(row[1]),
+            args.batch_size, args.dry_run
+        )
+        job_ids = backfill(
+            db, Job, Job.requirements,
+            lambda row: taxonomy.canonicalize_list(row[1]),
+            args.batch_size, args.dry_run
+        )
+        backfill(
+            db, Resume, Resume.extracted_skills,
+            lambda row: taxonomy.canonicalize_list((row[1] or []) + taxonomy.extract(row[2])),
+            args.batch_size, args.dry_run,
+            source_columns=(Resume.extracted_text,)
+        )
+
+        if job_ids and not args.dry_run:
+            for start in range(0, len(job_ids), args.batch_size):
+                chunk = job_ids[start:start + args.batch_size]
+                replace_job_skills(
+                    db.connection(),
+                    db.execute(select(Job.id, Job.requirements).where(Job.id.in_(chunk))).all()
+                )
+                db.execute(
+                    update(JobApplication)
+                    .where(JobApplication.job_id.in_(chunk))
+                    .values(match_score=None)
+                )
+                db.commit()
+            print(f"Rebuilt skills and cleared match scores for {len(job_ids)} jobs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
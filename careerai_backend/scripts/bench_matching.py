@@ -0,0 +1,117 @@
+"""
+Skill matching microbenchmark
+
+Builds a synthetic catalog of jobs (requirement lists mixing bare skill names
+with sentences, skill popularity Zipf-distributed like real postings) and
+times scoring one candidate against all of it with the sparse JobSkillMatrix,
+compared with a per-job Python set-overlap loop doing the same arithmetic.
+
+Usage:
+    python scripts/bench_matching.py [--jobs 100000] [--skills 3000] [--candidates 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from matching import JobSkillMatrix
+
+PREFIXES = "cloud data web mobile api test ml devops security ui".split()
+SENTENCES = (
+    "{n}+ years of experience with {skill}",
+    "Strong knowledge of {skill} and {other}",
+    "Hands-on experience using {skill}",
+)
+
+
+def make_skills(n_skills: int, rng: random.Random) -> list:
+    return [f"{rng.choice(PREFIXES)} tool{i}" if i % 4 == 0 else f"skill{i}" for i in range(n_skills)]
+
+
+def make_catalog(n_jobs: int, skills: list, rng: random.Random) -> list:
+    weights = [1.0 / (rank + 1) for rank in range(len(skills))]
+    jobs = []
+    for i in range(n_jobs):
+        picked = list(dict.fromkeys(rng.choices(skills, weights=weights, k=rng.randint(4, 12))))
+        requirements = picked[:-2]
+        if len(picked) >= 2:
+            requirements.append(rng.choice(SENTENCES).format(n=rng.randint(1, 8), skill=picked[-2], other=picked[-1]))
+        jobs.append((f"job-{i}", requirements))
+    return jobs
+
+
+def python_scores(jobs_terms: list, idf: dict, candidate: set) -> list:
+    """Reference: the same weighted overlap one job at a time"""
+    scores = []
+    for terms in jobs_terms:
+        total = sum(idf[t] for t in terms)
+        covered = sum(idf[t] for t in terms if t in candidate)
+        scores.append(100.0 * covered / total if total else 0.0)
+    return scores
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def report(label, seconds):
+    ordered = sorted(seconds)
+    p99 = ordered[min(len(ordered) - 1, int(round(0.99 * (len(ordered) - 1))))]
+    print(
+        f"{label:<30} p50={statistics.median(ordered) * 1000:8.2f} ms  "
+        f"p99={p99 * 1000:8.2f} ms  mean={statistics.mean(ordered) * 1000:8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100000, help="Number of synthetic jobs")
+    parser.add_argument("--skills", type=int, default=3000, help="Size of the skill universe")
+    parser.add_argument("--candidates", type=int, default=50, help="Candidates scored per measurement")
+    parser.add_argument("--top-k", type=int, default=20, help="Jobs returned per candidate")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    skills = make_skills(args.skills, rng)
+    jobs = make_catalog(args.jobs, skills, rng)
+    candidates = [rng.sample(skills[:500], rng.randint(5, 25)) for _ in range(args.candidates)]
+
+    index, build_seconds = timed(JobSkillMatrix.build, jobs)
+    print(
+        f"Catalog: {len(index)} jobs, {len(index.vocabulary)} skills, "
+        f"{index.matrix.nnz} requirement entries; index built in {build_seconds:.2f} s\n"
+    )
+
+    sparse_times, topk_times, python_times = [], [], []
+    rows = [
+        index.matrix.indices[index.matrix.indptr[i]:index.matrix.indptr[i + 1]].tolist()
+        for i in range(len(index))
+    ]
+    idf = dict(enumerate(index.idf.tolist()))
+
+    for skills_list in candidates:
+        candidate = index.candidate_vector(skills_list)
+        scores, seconds = timed(index.scores, candidate)
+        sparse_times.append(seconds)
+        topk_times.append(timed(index.top_k, candidate, args.top_k)[1])
+
+        reference, seconds = timed(python_scores, rows, idf, set(np.flatnonzero(candidate).tolist()))
+        python_times.append(seconds)
+        assert np.allclose(scores, reference), "sparse and reference scores disagree"
+
+    report("sparse scores (all jobs)", sparse_times)
+    report(f"sparse scores + top-{args.top_k}", topk_times)
+    report("python loop (all jobs)", python_times)
+
+
+if __name__ == "__main__":
+    main()
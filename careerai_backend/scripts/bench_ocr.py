@@ -0,0 +1,166 @@
+"""
+Scanned resume OCR benchmark
+
+Generates a corpus of image-only PDFs (text rendered to bitmaps with Pillow,
+so there is no text layer and every page needs OCR) and times reading them:
+
+    serial      every page rendered and OCRed in turn in one process (before)
+    parallel    ocr.ocr_pages: pages of a resume spread over the worker pool,
+                results written to the per-page cache
+    cached      the same resumes again (re-extraction): served from the cache
+
+Per-resume latency and word recall against the rendered text are reported
+for each DPI given. Needs poppler-utils and tesseract-ocr installed.
+
+Usage:
+    python scripts/bench_ocr.py [--resumes 8] [--pages 3] [--dpi 200 300] [--workers 0]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORDS = (
+    "python java react docker kubernetes sql postgres aws azure linux git "
+    "developed designed implemented led managed built migrated automated "
+    "service platform pipeline dashboard api backend frontend database team "
+    "university bachelor master engineering science project intern analyst"
+).split()
+PAGE_SIZE = (8.5, 11)  # inches
+RENDER_DPI = 150
+
+
+def make_page_text(rng: random.Random, lines: int = 40) -> str:
+    return "\n".join(" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 10))) for _ in range(lines))
+
+
+def write_pdf(path: str, pages: list):
+    """Image-only PDF with one rendered page per text"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 22)
+    except OSError:
+        font = ImageFont.load_default()
+    size = (int(PAGE_SIZE[0] * RENDER_DPI), int(PAGE_SIZE[1] * RENDER_DPI))
+    images = []
+    for text in pages:
+        image = Image.new("L", size, 255)
+        ImageDraw.Draw(image).multiline_text((90, 90), text, fill=0, font=font, spacing=12)
+        images.append(image)
+    images[0].save(path, "PDF", resolution=RENDER_DPI, save_all=True, append_images=images[1:])
+
+
+def make_corpus(directory: str, n_resumes: int, n_pages: int, seed: int = 7) -> list:
+    """[(path, content hash, [page text, ...])]"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n_resumes):
+        pages = [make_page_text(rng) for _ in range(n_pages)]
+        path = os.path.join(directory, f"resume-{i}.pdf")
+        write_pdf(path, pages)
+        with open(path, "rb") as f:
+            corpus.append((path, hashlib.sha256(f.read()).hexdigest(), pages))
+    return corpus
+
+
+def recall(source: str, ocr_text: str) -> float:
+    """Share of the rendered words OCR read back"""
+    expected = source.lower().split()
+    found = set(re.findall(r"[a-z]+", ocr_text.lower()))
+    return sum(word in found for word in expected) / len(expected) if expected else 1.0
+
+
+def report(label: str, latencies: list, recalls: list, pages: int):
+    total = sum(latencies)
+    print(
+        f"  {label:<9} per resume: mean={statistics.mean(latencies):7.2f} s  "
+        f"max={max(latencies):7.2f} s   {pages / total:6.2f} pages/s   "
+        f"recall={statistics.mean(recalls) * 100:5.1f}%"
+    )
+
+
+def run_serial(corpus: list, dpi: int):
+    import documents
+
+    latencies, recalls = [], []
+    for path, _, pages in corpus:
+        started = time.perf_counter()
+        texts = [documents.ocr_page(path, number, dpi) for number in range(1, len(pages) + 1)]
+        latencies.append(time.perf_counter() - started)
+        recalls.extend(recall(source, text) for source, text in zip(pages, texts))
+    return latencies, recalls
+
+
+async def run_pooled(corpus: list, dpi: int):
+    import ocr
+
+    latencies, recalls = [], []
+    for path, content_hash, pages in corpus:
+        started = time.perf_counter()
+        results = await ocr.ocr_pages(path, range(1, len(pages) + 1), content_hash, dpi)
+        latencies.append(time.perf_counter() - started)
+        for number, source in enumerate(pages, start=1):
+            text = results[number]
+            if isinstance(text, BaseException):
+                raise text
+            recalls.append(recall(source, text))
+    return latencies, recalls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=8, help="Number of generated PDFs")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per PDF")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[200, 300], help="Render resolutions to compare")
+    parser.add_argument("--workers", type=int, default=0, help="OCR worker processes (0 = one per CPU core)")
+    parser.add_argument("--skip-serial", action="store_true", help="Only time the pool and the cache")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="careerai_ocr_bench_")
+    # Settings are read at import: point the cache at a scratch database first
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["OCR_WORKERS"] = str(args.workers)
+    os.environ["DEBUG"] = "false"  # no SQL echo
+
+    import ocr
+    from database import engine, async_engine
+    from models import OcrPage
+
+    OcrPage.__table__.create(engine, checkfirst=True)
+    try:
+        corpus = make_corpus(tmpdir, args.resumes, args.pages)
+        n_pages = args.resumes * args.pages
+        print(f"{args.resumes} image-only PDFs x {args.pages} pages, {ocr.worker_count()} OCR workers\n")
+
+        async def pooled_runs():
+            try:
+                for dpi in args.dpi:
+                    print(f"dpi={dpi}")
+                    if not args.skip_serial:
+                        report("serial", *run_serial(corpus, dpi), n_pages)
+                    report("parallel", *(await run_pooled(corpus, dpi)), n_pages)
+                    report("cached", *(await run_pooled(corpus, dpi)), n_pages)
+            finally:
+                ocr.shutdown()
+                await async_engine.dispose()
+
+        asyncio.run(pooled_runs())
+    finally:
+        engine.dispose()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
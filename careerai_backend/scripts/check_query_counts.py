@@ -0,0 +1,151 @@
+"""
+SQL statement counts for the application and interview listings
+
+Seeds a temporary SQLite database, then calls each listing endpoint with
+growing page sizes (for the unpaginated student listing: students with that
+many applications) and counts the SQL statements it runs. Every listing must
+run the same number of statements whatever the page size (no per-row
+lookups); the script exits non-zero if any count grows.
+
+Usage:
+    python scripts/check_query_counts.py [--sizes 1,5,25]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TMPDIR = tempfile.mkdtemp(prefix="careerai_querycount_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMPDIR, 'querycount.db')}"
+os.environ["DEBUG"] = "false"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import database
+from models import User, Job, JobApplication, InterviewResult, UserRole, UserStatus, JobType, ApplicationStatus
+
+
+def seed(sizes: list) -> dict:
+    """
+    One job with max(sizes) applicants, and for each size a student who has
+    applied to that many jobs; every application has an interview result
+    """
+    now = datetime.utcnow()
+    n = max(sizes)
+    employer_id, admin_id = str(uuid.uuid4()), str(uuid.uuid4())
+    applicants = [str(uuid.uuid4()) for _ in range(n)]
+    students = {size: str(uuid.uuid4()) for size in sizes}
+    jobs = [str(uuid.uuid4()) for _ in range(n)]
+
+    def user(user_id, email, role):
+        return {
+            "id": user_id, "email": email, "hashed_password": "x", "first_name": "Q",
+            "last_name": email.split("@")[0], "role": role, "status": UserStatus.ACTIVE, "created_at": now,
+        }
+
+    def application(job_id, user_id, i):
+        return {
+            "id": str(uuid.uuid4()), "job_id": job_id, "user_id": user_id,
+            "status": ApplicationStatus.PENDING, "applied_date": now - timedelta(seconds=i),
+        }
+
+    with database.engine.begin() as conn:
+        conn.execute(insert(User), [
+            user(employer_id, "employer@example.com", UserRole.EMPLOYER),
+            user(admin_id, "admin@example.com", UserRole.ADMIN),
+            *(user(sid, f"applicant{i}@example.com", UserRole.STUDENT) for i, sid in enumerate(applicants)),
+            *(user(sid, f"student{size}@example.com", UserRole.STUDENT) for size, sid in students.items()),
+        ])
+        conn.execute(insert(Job), [{
+            "id": job_id, "title": f"Job {i}", "description": "d", "location": "Remote",
+            "job_type": JobType.FULL_TIME, "company_name": "Acme", "requirements": ["Python", "SQL"],
+            "applicant_count": 0, "posted_by": employer_id, "posted_date": now - timedelta(minutes=i),
+            "is_active": True,
+        } for i, job_id in enumerate(jobs)])
+        applications = [
+            *(application(jobs[0], sid, i) for i, sid in enumerate(applicants)),
+            *(application(job_id, sid, i) for size, sid in students.items() for i, job_id in enumerate(jobs[:size])),
+        ]
+        conn.execute(insert(JobApplication), applications)
+        conn.execute(insert(InterviewResult), [{
+            "id": str(uuid.uuid4()), "application_id": app["id"], "interview_date": app["applied_date"],
+            "job_title": "Job", "questions": [{"question": "q"}] * 10, "answers": [{"answer": "a"}] * 10,
+            "technical_score": 70.0, "communication_score": 70.0, "confidence_level": "Medium",
+            "overall_score": float(i % 100), "readiness_level": "Ready",
+            "hiring_recommendation": "Hire", "detailed_feedback": "f",
+        } for i, app in enumerate(applications)])
+
+    return {"employer": employer_id, "admin": admin_id, "students": students, "job": jobs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,5,25", help="Comma-separated page sizes to compare")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    import main as app_module
+    from core_auth import AuthService
+
+    app_module.init_database()
+    ids = seed(sizes)
+
+    def auth(user_id):
+        return {"Authorization": "Bearer " + AuthService.create_access_token({"sub": user_id})}
+
+    statements = []
+    event.listen(
+        database.async_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *rest: statements.append(statement)
+    )
+
+    checks = {
+        "GET /api/applications": lambda size: ("/api/applications", auth(ids["students"][size]), {}),
+        "GET /api/applications/job/{id}/applicants": lambda size: (
+            f"/api/applications/job/{ids['job']}/applicants", auth(ids["employer"]), {"limit": size}
+        ),
+        "GET /api/admin/applications": lambda size: (
+            "/api/admin/applications", auth(ids["admin"]), {"page_size": size}
+        ),
+        "GET /api/interviews/interviews/applicant/{id}": lambda size: (
+            f"/api/interviews/interviews/applicant/{ids['job']}", auth(ids["employer"]),
+            {"limit": size, "sort": "overall_score"}
+        ),
+        "GET /api/interviews/interviews/student/{id}/history": lambda size: (
+            f"/api/interviews/interviews/student/{ids['students'][size]}/history",
+            auth(ids["students"][size]), {}
+        ),
+    }
+
+    failed = False
+    with TestClient(app_module.app) as client:
+        for label, request in checks.items():
+            counts = []
+            for size in sizes:
+                path, headers, params = request(size)
+                client.get(path, headers=headers, params=params)  # warm caches and scoring
+                statements.clear()
+                response = client.get(path, headers=headers, params=params)
+                response.raise_for_status()
+                counts.append(len(statements))
+            constant = len(set(counts)) == 1
+            failed |= not constant
+            print(f"{'ok  ' if constant else 'FAIL'} {label:<55} " + "  ".join(
+                f"size {size}: {count}" for size, count in zip(sizes, counts)
+            ))
+
+    database.engine.dispose()
+    shutil.rmtree(TMPDIR, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Query plan check for the router hot paths
+
+Runs EXPLAIN on the queries behind each listing and lookup endpoint, against
+the configured database, and fails when a plan reads one of the large tables
+with a sequential scan (no usable index). On SQLite a full walk of an
+unrelated index ("SCAN t USING INDEX ...") counts too, except for the
+unfiltered keyset pages, which stop after one page. On PostgreSQL
+sequential scans are disabled for the session first, so the planner picks
+an index whenever one can serve the query regardless of how small the
+tables are right now.
+
+Whole-table reports (the admin statistics and analytics counts) are not
+hot paths and are not checked.
+
+Usage:
+    python scripts/explain_queries.py [--verbose]
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import aliased
+
+from database import engine
+from models import (
+    User, Job, Resume, ResumeAnalysis, JobApplication, InterviewResult, job_skills
+)
+from pagination import apply_keyset
+from routers.jobs import jobs_with_skills
+
+# Tables that grow with users and traffic; the rest are small lookup tables
+LARGE_TABLES = {
+    "users", "jobs", "job_applications", "resumes",
+    "resume_analyses", "interview_results", "job_skills",
+}
+
+# Unfiltered keyset pages: walking the (timestamp, id) index in order is the plan
+ORDERED_PAGES = {"admin: users page", "admin: applications page"}
+
+ID = "00000000-0000-0000-0000-000000000000"
+PAGE = 20
+
+
+def router_queries() -> dict:
+    """Label -> statement, mirroring the queries the routers run"""
+    Applicant, Employer = aliased(User), aliased(User)
+    return {
+        "auth: login by email": select(User).where(User.email == "user@example.com"),
+        "users: principal lookup": select(User.id, User.role, User.status).where(User.id == ID),
+        "admin: pending approvals": select(User).where(
+            User.role == "EMPLOYER", User.status == "PENDING"
+        ).order_by(User.created_at.desc()),
+        "admin: users page": apply_keyset(select(User), User.created_at, User.id, None).limit(PAGE),
+        "jobs: public listing": apply_keyset(
+            select(Job).where(Job.is_active == True), Job.posted_date, Job.id, None
+        ).limit(PAGE + 1),
+        "jobs: listing by skill": apply_keyset(
+            select(Job).where(Job.is_active == True, Job.id.in_(jobs_with_skills(["Python", "SQL"]))),
+            Job.posted_date, Job.id, None
+        ).limit(PAGE + 1),
+        "jobs: listing by all skills": select(Job).where(
+            Job.id.in_(jobs_with_skills(["Python", "SQL"], "all"))
+        ),
+        "jobs: employer's jobs": apply_keyset(
+            select(Job).where(Job.posted_by == ID), Job.posted_date, Job.id, None
+        ).limit(PAGE + 1),
+        "jobs: job_skills of a job": select(job_skills).where(job_skills.c.job_id == ID),
+        "applications: duplicate check": select(JobApplication).where(
+            JobApplication.job_id == ID, JobApplication.user_id == ID
+        ),
+        "applications: student's applications": select(
+            JobApplication.id, JobApplication.applied_date, Job.title, Job.company_name
+        ).outerjoin(Job, Job.id == JobApplication.job_id).where(
+            JobApplication.user_id == ID
+        ).order_by(JobApplication.applied_date.desc()),
+        "applications: applicants by date": select(
+            JobApplication.id, JobApplication.applied_date, User.first_name, User.email
+        ).join(User, User.id == JobApplication.user_id).where(
+            JobApplication.job_id == ID
+        ).order_by(JobApplication.applied_date.desc(), JobApplication.id.desc()).limit(PAGE),
+        "applications: applicants by match": select(
+            JobApplication.id, JobApplication.match_score, User.first_name, User.email
+        ).join(User, User.id == JobApplication.user_id).where(
+            JobApplication.job_id == ID
+        ).order_by(
+            JobApplication.match_score.desc().nulls_last(),
+            JobApplication.applied_date.desc(), JobApplication.id.desc()
+        ).limit(PAGE),
+        "applications: scoring inputs": select(
+            JobApplication.id, Resume.extracted_skills, User.skills
+        ).join(User, User.id == JobApplication.user_id).outerjoin(
+            Resume, Resume.id == JobApplication.resume_id
+        ).where(JobApplication.job_id == ID, JobApplication.match_score.is_(None)),
+        "admin: applications page": apply_keyset(
+            select(JobApplication.id, Job.title, Applicant.email, Employer.email)
+            .outerjoin(Job, Job.id == JobApplication.job_id)
+            .outerjoin(Applicant, Applicant.id == JobApplication.user_id)
+            .outerjoin(Employer, Employer.id == Job.posted_by),
+            JobApplication.applied_date, JobApplication.id, None
+        ).limit(PAGE + 1),
+        "resumes: user's resumes": select(Resume).where(
+            Resume.user_id == ID
+        ).order_by(Resume.uploaded_at.desc()),
+        "resumes: primary resume": select(Resume).where(
+            Resume.user_id == ID, Resume.is_primary == True
+        ),
+        "analysis: history": select(ResumeAnalysis).where(
+            ResumeAnalysis.resume_id == ID
+        ).order_by(ResumeAnalysis.analyzed_at.desc()),
+        "analysis: by job": select(ResumeAnalysis.id).where(ResumeAnalysis.job_id == ID),
+        "analysis: memoized result": select(ResumeAnalysis).where(
+            ResumeAnalysis.input_hash == "0" * 64,
+            ResumeAnalysis.analysis_version == "1.0",
+            ResumeAnalysis.job_id == ID,
+            ResumeAnalysis.job_updated_at == datetime(2024, 1, 1)
+        ).order_by(
+            case((ResumeAnalysis.resume_id == ID, 0), else_=1), ResumeAnalysis.analyzed_at.desc()
+        ).limit(1),
+        "analysis: applications by resume": select(JobApplication.id).where(
+            JobApplication.resume_id == ID
+        ),
+        "interviews: by application": select(InterviewResult).where(
+            InterviewResult.application_id == ID
+        ),
+        "interviews: job applicants": select(InterviewResult).join(
+            JobApplication, JobApplication.id == InterviewResult.application_id
+        ).where(JobApplication.job_id == ID).order_by(
+            InterviewResult.interview_date.desc(), InterviewResult.id.desc()
+        ),
+        "interviews: student history": select(InterviewResult).join(
+            JobApplication, JobApplication.id == InterviewResult.application_id
+        ).where(JobApplication.user_id == ID).order_by(
+            InterviewResult.overall_score.desc(), InterviewResult.id.desc()
+        ),
+        "applications: count for a job": select(func.count()).select_from(
+            JobApplication
+        ).where(JobApplication.job_id == ID),
+    }
+
+
+def explain(conn, statement) -> list:
+    """Plan lines for statement on this connection's dialect"""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if conn.dialect.name == "postgresql":
+        rows = conn.exec_driver_sql("EXPLAIN " + str(compiled), params).all()
+        return [row[0] for row in rows]
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+        return [row[-1] for row in rows]
+    raise SystemExit(f"EXPLAIN is not supported for dialect {conn.dialect.name}")
+
+
+_SEQ_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)()"),
+    # "SCAN jobs" reads the table; "SCAN jobs USING INDEX ..." walks a whole index
+    "sqlite": re.compile(r"^SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?$"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not just failing ones")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        seq_scan = _SEQ_SCAN.get(dialect)
+
+        for label, statement in router_queries().items():
+            plan = explain(conn, statement)
+            scanned = [
+                match.group(1) for line in plan
+                for match in [seq_scan.search(line.strip())]
+                if match and not (match.group(2) and label in ORDERED_PAGES)
+            ]
+            bad = sorted(set(scanned) & LARGE_TABLES)
+            failures += bool(bad)
+            print(f"{'FAIL' if bad else 'ok  '} {label:<40} " + (f"full scan of {', '.join(bad)}" if bad else ""))
+            if bad or args.verbose:
+                for line in plan:
+                    print(f"       {line}")
+
+    print(f"\n{failures} of {len(router_queries())} queries scan a large table" if failures else "\nNo sequential scans on large tables")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Move resume files stored before content addressing into the blob store
+
+Older uploads live at uploads/resumes/{user_id}_{filename}, and re-uploads
+under the same name shared (and overwrote) one file. For every resume whose
+file is not yet at its content-addressed path, the file is hashed, copied
+into uploads/resumes/blobs/ab/cd/<sha256> with a reference added for the
+resume, and the resume row repointed at it. Old files are deleted once no
+resume refers to them. Rows are processed in primary-key batches with one
+commit per batch, so the script can be stopped and re-run safely.
+
+Usage:
+    python scripts/migrate_resume_blobs.py [--batch-size 200] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import select, update, func
+
+from database import SessionLocal
+from models import Resume
+from blobs import blob_path, acquire_blob
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str):
+    """(size, SHA-256 hex) of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            size += len(chunk)
+            digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+def place_blob(source: str, content_hash: str):
+    """Copy source to its blob path (temp file + rename) unless already there"""
+    destination = blob_path(content_hash)
+    if destination.exists():
+        return
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(f".{uuid.uuid4().hex}.part")
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200, help="Resumes moved per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would move without writing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    dialect = db.bind.dialect.name
+    moved, missing, old_paths = 0, [], set()
+    last_id = None
+    try:
+        while True:
+            query = select(Resume.id, Resume.file_path, Resume.content_hash).order_by(Resume.id).limit(args.batch_size)
+            if last_id is not None:
+                query = query.where(Resume.id > last_id)
+            rows = db.execute(query).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                if row.content_hash and row.file_path == str(blob_path(row.content_hash)):
+                    continue
+                if not os.path.exists(row.file_path):
+                    missing.append(row.id)
+                    continue
+                size, content_hash = file_digest(row.file_path)
+                moved += 1
+                if args.dry_run:
+                    continue
+                # Lock the blob row before placing the file, as uploads do
+                db.execute(acquire_blob(dialect, content_hash, size))
+                place_blob(row.file_path, content_hash)
+                db.execute(
+                    update(Resume).where(Resume.id == row.id).values(
+                        file_path=str(blob_path(content_hash)), file_size=size, content_hash=content_hash
+                    )
+                )
+                old_paths.add(row.file_path)
+            db.commit()
+
+        removed = 0
+        for path in sorted(old_paths):
+            still_used = db.execute(
+                select(func.count()).select_from(Resume).where(Resume.file_path == path)
+            ).scalar()
+            if not still_used:
+                os.remove(path)
+                removed += 1
+    finally:
+        db.close()
+
+    print(f"{moved} resumes {'would move' if args.dry_run else 'moved'} into the blob store")
+    if not args.dry_run:
+        print(f"{removed} old files removed")
+    if missing:
+        print(f"{len(missing)} resumes have no file on disk: {', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}")
+
+
+if __name__ == "__main__":
+    main()
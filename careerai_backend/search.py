@@ -0,0 +1,114 @@
+"""
+Job keyword search backends
+
+Each backend turns a free-text keyword into a filtered job query plus an
+optional relevance expression (higher is better) and a highlighted snippet.
+The backend is picked once at startup from what the database supports:
+Postgres tsvector/GIN, SQLite FTS5, or a plain LIKE scan as the fallback.
+"""
+
+from typing import NamedTuple, Optional
+import logging
+import re
+
+from sqlalchemy import Select, inspect, or_, false, func, literal_column, table, column
+from sqlalchemy.sql.elements import ColumnElement
+
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+
+class SearchMatch(NamedTuple):
+    query: Select
+    rank: Optional[ColumnElement] = None
+    snippet: Optional[ColumnElement] = None
+
+class JobSearch:
+    """Fallback search: case-insensitive substring scan, no ranking"""
+
+    name = "like"
+
+    def match(self, query: Select, keyword: str) -> SearchMatch:
+        return SearchMatch(query.where(
+            or_(
+                Job.title.ilike(f"%{keyword}%"),
+                Job.description.ilike(f"%{keyword}%")
+            )
+        ))
+
+class PostgresJobSearch(JobSearch):
+    """Search over the generated jobs.search_vector column (GIN indexed)"""
+
+    name = "postgres"
+
+    def match(self, query: Select, keyword: str) -> SearchMatch:
+        tsquery = func.websearch_to_tsquery("english", keyword)
+        vector = literal_column("jobs.search_vector")
+        return SearchMatch(
+            query.where(vector.op("@@")(tsquery)),
+            rank=func.ts_rank_cd(vector, tsquery),
+            snippet=func.ts_headline(
+                "english", Job.description, tsquery,
+                f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=35, MinWords=15, MaxFragments=2"
+            )
+        )
+
+jobs_fts = table("jobs_fts", column("job_id"), column("title"), column("description"))
+
+class SqliteJobSearch(JobSearch):
+    """Search over the jobs_fts FTS5 table (BM25 ranking)"""
+
+    name = "sqlite_fts5"
+
+    # bm25 column weights: job_id (unindexed), title, description
+    TITLE_WEIGHT = 10.0
+    DESCRIPTION_WEIGHT = 1.0
+
+    @staticmethod
+    def to_fts_query(keyword: str) -> str:
+        """Quote each word so user input can't inject FTS5 syntax (all words must match)"""
+        return " ".join(f'"{term}"' for term in re.findall(r"\w+", keyword))
+
+    def match(self, query: Select, keyword: str) -> SearchMatch:
+        fts_query = self.to_fts_query(keyword)
+        if not fts_query:
+            # Nothing searchable (punctuation only) matches nothing, as in Postgres
+            return SearchMatch(query.where(false()))
+
+        fts = literal_column("jobs_fts")
+        return SearchMatch(
+            query.join(jobs_fts, jobs_fts.c.job_id == Job.id).where(fts.op("MATCH")(fts_query)),
+            # bm25() is lower-is-better; negate so every backend ranks descending
+            rank=-func.bm25(fts, 0.0, self.TITLE_WEIGHT, self.DESCRIPTION_WEIGHT),
+            snippet=func.snippet(fts, 2, SNIPPET_START, SNIPPET_END, "…", 24)
+        )
+
+_job_search: JobSearch = JobSearch()
+
+def configure_job_search(engine) -> JobSearch:
+    """Pick the best search backend the database has been migrated for"""
+    global _job_search
+
+    try:
+        inspector = inspect(engine)
+        dialect = engine.dialect.name
+        if dialect == "postgresql" and any(
+            col["name"] == "search_vector" for col in inspector.get_columns("jobs")
+        ):
+            _job_search = PostgresJobSearch()
+        elif dialect == "sqlite" and inspector.has_table("jobs_fts"):
+            _job_search = SqliteJobSearch()
+        else:
+            _job_search = JobSearch()
+    except Exception as e:
+        logger.warning("Could not inspect database for full-text search support: %s", e)
+        _job_search = JobSearch()
+
+    logger.info("Job search backend: %s", _job_search.name)
+    return _job_search
+
+def get_job_search() -> JobSearch:
+    return _job_search
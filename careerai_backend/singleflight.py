@@ -0,0 +1,80 @@
+"""
+Single-flight request coalescing
+
+Concurrent identical reads share one computation: the first caller for a
+key starts it, callers arriving while it runs wait on the same future, and
+the key is free again as soon as it finishes (nothing is cached - pair it
+with cache.py for that).
+
+The shared computation must not depend on any one caller: it opens its own
+database session rather than using a request's, and it is shielded, so a
+caller that disconnects does not cancel it for the others. Keys should hold
+everything the result depends on - route, normalized parameters and the
+caller's auth scope when the answer differs per user or role.
+
+Each group counts executed and coalesced calls; metrics() reports them all
+(GET /api/admin/metrics).
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+
+_groups: Dict[str, "SingleFlight"] = {}
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._executed = 0
+        self._coalesced = 0
+        self._failed = 0
+        _groups[name] = self
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Future of the computation for key, calling fn() unless one is already running"""
+        future = self._flights.get(key)
+        if future is not None and not future.done():
+            self._coalesced += 1
+            return future
+
+        self._executed += 1
+        future = self._flights[key] = asyncio.ensure_future(fn())
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of fn() for key, shared with identical calls in flight"""
+        # Shielded so one cancelled caller does not abort what others wait on
+        return await asyncio.shield(self.start(key, fn))
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._flights.get(key) is future:
+            del self._flights[key]
+        # Marks the exception retrieved; waiting callers still see it raised
+        if not future.cancelled() and future.exception() is not None:
+            self._failed += 1
+
+    def metrics(self) -> dict:
+        total = self._executed + self._coalesced
+        return {
+            "executed": self._executed,
+            "coalesced": self._coalesced,
+            "failed": self._failed,
+            "in_flight": len(self._flights),
+            "coalesced_ratio": round(self._coalesced / total, 4) if total else 0.0,
+        }
+
+def flight_key(route: str, params: Optional[dict] = None, scope: Hashable = None) -> tuple:
+    """
+    Key of a read: the route, its parameters with unset (None) ones dropped
+    and sorted, and the auth scope (None when every caller gets the same answer)
+    """
+    items = tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in (params or {}).items() if value is not None
+    ))
+    return (route, items, scope)
+
+def metrics() -> dict:
+    """Counters of every single-flight group in this process"""
+    return {name: group.metrics() for name, group in sorted(_groups.items())}
@@ -0,0 +1,50 @@
+"""
+job_skills maintenance
+
+job_skills holds one (job_id, skill) row per normalized skill a job asks for
+(see matching.job_skill_keys), so skill filters are indexed lookups instead
+of scans of the Job.requirements JSON. Rows are kept in sync by the Job
+mapper events in models.py; bulk writers that bypass the ORM (backfills,
+migrations) call replace_job_skills / rebuild_job_skills directly.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import select, delete, insert
+from sqlalchemy.engine import Connection
+
+from matching import job_skill_keys
+
+def replace_job_skills(conn: Connection, jobs: Iterable[Tuple[str, Optional[list]]]):
+    """Rewrite the job_skills rows of each (job_id, requirements) pair"""
+    from models import job_skills
+
+    jobs = list(jobs)
+    if not jobs:
+        return
+
+    conn.execute(delete(job_skills).where(job_skills.c.job_id.in_([job_id for job_id, _ in jobs])))
+    rows = [
+        {"job_id": job_id, "skill": skill}
+        for job_id, requirements in jobs
+        for skill in job_skill_keys(requirements)
+    ]
+    if rows:
+        conn.execute(insert(job_skills), rows)
+
+def rebuild_job_skills(conn: Connection, batch_size: int = 1000) -> int:
+    """Rebuild job_skills for every job, batch_size jobs at a time; returns jobs seen"""
+    from models import Job
+
+    last_id = None
+    seen = 0
+    while True:
+        query = select(Job.id, Job.requirements).order_by(Job.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Job.id > last_id)
+        rows = conn.execute(query).all()
+        if not rows:
+            return seen
+        replace_job_skills(conn, rows)
+        seen += len(rows)
+        last_id = rows[-1][0]
@@ -0,0 +1,241 @@
+"""
+Skill taxonomy
+
+Canonical skills come from the skills table and their alternative spellings
+from skill_aliases ("ReactJS", "react.js" -> "React"). Every name and alias is
+compiled into one Aho-Corasick automaton, so pulling the skills out of a
+document is a single pass over its text however large the taxonomy grows.
+
+The taxonomy is loaded once at startup (configure_taxonomy) and swapped
+atomically on reload; lookups never touch the database.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import re
+
+from sqlalchemy import select
+
+logger = logging.getLogger(__name__)
+
+# (name, category, aliases) seeded into an empty taxonomy. Very short or
+# ambiguous words ("go", "r") are deliberately left out: they would match
+# ordinary prose when extracting from free text.
+DEFAULT_SKILLS: Sequence[Tuple[str, str, Sequence[str]]] = (
+    ("Python", "Programming Language", ("python3",)),
+    ("JavaScript", "Programming Language", ("js", "ecmascript", "es6")),
+    ("TypeScript", "Programming Language", ()),
+    ("Java", "Programming Language", ()),
+    ("C++", "Programming Language", ("cpp",)),
+    ("C#", "Programming Language", ("csharp", "c sharp")),
+    ("Golang", "Programming Language", ()),
+    ("Rust", "Programming Language", ()),
+    ("Kotlin", "Programming Language", ()),
+    ("Swift", "Programming Language", ()),
+    ("SQL", "Database", ()),
+    ("PostgreSQL", "Database", ("postgres", "psql")),
+    ("MySQL", "Database", ()),
+    ("MongoDB", "Database", ("mongo",)),
+    ("Redis", "Database", ()),
+    ("React", "Framework", ("reactjs", "react.js")),
+    ("Angular", "Framework", ("angularjs", "angular.js")),
+    ("Vue.js", "Framework", ("vue", "vuejs")),
+    ("Node.js", "Framework", ("node", "nodejs")),
+    ("Express.js", "Framework", ("express", "expressjs")),
+    ("Django", "Framework", ()),
+    ("Flask", "Framework", ()),
+    ("FastAPI", "Framework", ()),
+    ("Spring Boot", "Framework", ("spring",)),
+    ("HTML", "Web", ("html5",)),
+    ("CSS", "Web", ("css3",)),
+    ("Tailwind CSS", "Web", ("tailwind", "tailwindcss")),
+    ("REST APIs", "Web", ("rest", "rest api", "restful", "restful apis")),
+    ("GraphQL", "Web", ()),
+    ("Docker", "DevOps", ()),
+    ("Kubernetes", "DevOps", ("k8s",)),
+    ("AWS", "Cloud", ("amazon web services",)),
+    ("Azure", "Cloud", ("microsoft azure",)),
+    ("Google Cloud", "Cloud", ("gcp", "google cloud platform")),
+    ("CI/CD", "DevOps", ("ci cd", "continuous integration", "continuous delivery")),
+    ("Git", "Tools", ()),
+    ("Linux", "Tools", ()),
+    ("Machine Learning", "Data", ("ml",)),
+    ("Deep Learning", "Data", ()),
+    ("Data Analysis", "Data", ("data analytics",)),
+    ("TensorFlow", "Data", ()),
+    ("PyTorch", "Data", ()),
+    ("Pandas", "Data", ()),
+    ("NumPy", "Data", ()),
+    ("Figma", "Design", ()),
+    ("Communication", "Soft Skill", ("communication skills",)),
+    ("Leadership", "Soft Skill", ()),
+)
+
+# Aliases above that are also ordinary words ("in spring 2023", "the rest of
+# the team"). They are exact-match only: a skill list entry that is exactly
+# the alias is canonicalized, but extract() never looks for them in text.
+EXACT_MATCH_ALIASES = frozenset({"node", "express", "spring", "rest"})
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_alias(text: str) -> str:
+    """Lowercase and collapse whitespace (the form aliases are stored and matched in)"""
+    return _WHITESPACE.sub(" ", text.lower()).strip()
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+class SkillTaxonomy:
+    """Canonical skill lookup and extraction over a compiled Aho-Corasick automaton"""
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[str, str]],
+        exact_entries: Iterable[Tuple[str, str]] = ()
+    ):
+        """
+        entries: (name or alias, canonical name) pairs; exact_entries: the
+        same for aliases only canonical_name matches (never searched for in text)
+        """
+        self._canonical: Dict[str, str] = {}
+        searchable: List[str] = []
+        for pattern, canonical in entries:
+            key = normalize_alias(pattern)
+            if key and key not in self._canonical:
+                self._canonical[key] = canonical
+                searchable.append(key)
+        for pattern, canonical in exact_entries:
+            key = normalize_alias(pattern)
+            if key:
+                self._canonical.setdefault(key, canonical)
+
+        # Trie over pattern characters; node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]  # pattern keys ending at this node
+        for key in searchable:
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(key)
+
+        # Breadth-first failure links; outputs inherit their suffix's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    @property
+    def skills(self) -> List[str]:
+        """Canonical skill names"""
+        return list(dict.fromkeys(self._canonical.values()))
+
+    def canonical_name(self, skill: str) -> Optional[str]:
+        """Canonical name when skill is exactly a known name or alias"""
+        return self._canonical.get(normalize_alias(skill))
+
+    def canonicalize(self, skill: str) -> str:
+        """Canonical name for a known skill; anything else is returned trimmed but unchanged"""
+        return self.canonical_name(skill) or skill.strip()
+
+    def canonicalize_list(self, skills: Optional[Iterable]) -> List[str]:
+        """Canonicalize each entry, dropping blanks and duplicates (order kept)"""
+        result: Dict[str, None] = {}
+        for skill in skills or []:
+            if isinstance(skill, str) and skill.strip():
+                result.setdefault(self.canonicalize(skill), None)
+        return list(result)
+
+    def extract(self, text: Optional[str]) -> List[str]:
+        """
+        Canonical skills mentioned anywhere in text, in order of first
+        mention. Matches must sit on word boundaries and overlapping matches
+        resolve to the leftmost, then longest ("machine learning" rather than
+        "learning").
+        """
+        if not text:
+            return []
+        text = normalize_alias(text)
+
+        matches = []
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for key in self._out[node]:
+                start = end - len(key)
+                if (start == 0 or not _is_word_char(text[start - 1])) and (
+                    end == len(text) or not _is_word_char(text[end])
+                ):
+                    matches.append((start, -len(key), key))
+
+        found: Dict[str, None] = {}
+        covered_to = 0
+        for start, neg_length, key in sorted(matches):
+            if start >= covered_to:
+                found.setdefault(self._canonical[key], None)
+                covered_to = start - neg_length
+        return list(found)
+
+def default_taxonomy() -> SkillTaxonomy:
+    entries, exact_entries = [], []
+    for name, _, aliases in DEFAULT_SKILLS:
+        entries.append((name, name))
+        for alias in aliases:
+            if normalize_alias(alias) in EXACT_MATCH_ALIASES:
+                exact_entries.append((alias, name))
+            else:
+                entries.append((alias, name))
+    return SkillTaxonomy(entries, exact_entries)
+
+def load_taxonomy(conn) -> SkillTaxonomy:
+    """Build the taxonomy from the skills and skill_aliases tables"""
+    from models import Skill, SkillAlias
+
+    names = conn.execute(select(Skill.name)).scalars().all()
+    aliases = conn.execute(
+        select(SkillAlias.alias, Skill.name, SkillAlias.exact_match)
+        .join(Skill, Skill.id == SkillAlias.skill_id)
+    ).all()
+    return SkillTaxonomy(
+        [(name, name) for name in names] + [(alias, name) for alias, name, exact in aliases if not exact],
+        [(alias, name) for alias, name, exact in aliases if exact]
+    )
+
+_taxonomy: SkillTaxonomy = default_taxonomy()
+
+def configure_taxonomy(engine) -> SkillTaxonomy:
+    """Load the taxonomy from the database (the built-in defaults if that fails)"""
+    global _taxonomy
+
+    try:
+        with engine.connect() as conn:
+            taxonomy = load_taxonomy(conn)
+        _taxonomy = taxonomy if len(taxonomy) else default_taxonomy()
+    except Exception as e:
+        logger.warning("Could not load skill taxonomy: %s", e)
+        _taxonomy = default_taxonomy()
+
+    logger.info("Skill taxonomy: %d names and aliases", len(_taxonomy))
+    return _taxonomy
+
+def get_taxonomy() -> SkillTaxonomy:
+    return _taxonomy